@@ -0,0 +1,60 @@
+# Время импорта при старте и проверка, что тяжёлые зависимости грузятся лениво.
+#   python benchmarks/importtime.py [--budget-ms 400] [--runs 5]
+# Код выхода 1 — тяжёлый модуль попал в старт или превышен бюджет.
+import argparse
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Что не должно импортироваться до первого использования
+TARGETS = {
+    "melodine.app": ("yt_dlp", "mutagen", "InquirerPy"),
+    "melodine.cli": ("yt_dlp", "mutagen", "InquirerPy", "rich", "pydantic", "yaml"),
+}
+
+
+def importtime(module: str) -> tuple[int, dict[str, int]]:
+    out = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stderr
+    cumulative = {}
+    for line in out.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cum, name = line.split("|")
+        if cum.strip().isdigit():
+            cumulative[name.strip()] = int(cum)
+    return cumulative.get(module, 0), cumulative
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--budget-ms", type=float, default=0, help="fail if the best run is slower")
+    ap.add_argument("--runs", type=int, default=5)
+    args = ap.parse_args()
+
+    failed = False
+    for module, forbidden in TARGETS.items():
+        runs = [importtime(module) for _ in range(max(1, args.runs))]
+        best_us, modules = min(runs, key=lambda r: r[0])
+        heavy = [m for m in forbidden if m in modules]
+        top = sorted(
+            ((us, name) for name, us in modules.items() if name != module and "." not in name),
+            reverse=True,
+        )[:5]
+        print(f"{module:<14} {best_us / 1000:>7.1f} ms   top: "
+              + ", ".join(f"{name} {us / 1000:.0f}" for us, name in top))
+        if heavy:
+            print(f"  eager import of {', '.join(heavy)}")
+            failed = True
+        if args.budget_ms and best_us / 1000 > args.budget_ms:
+            print(f"  over budget ({args.budget_ms} ms)")
+            failed = True
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
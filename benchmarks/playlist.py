@@ -0,0 +1,72 @@
+# Микробенчмарк парсера плейлистов на сгенерированном файле.
+#   python benchmarks/playlist.py [--lines 1000000]
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from melodine.utils import iter_playlist, parse_playlist
+
+_LINES = [
+    "{n}. Artist {n} - Track {n}",
+    "{n}) Исполнитель {n} — Песня {n}",
+    "#{n} Band {n} – Song {n} (Remix)",
+    "Artist {n} - Title {n}",
+    "Just a title {n}",
+    "# comment {n}",
+    "https://example.com/{n}",
+    "=====",
+    "",
+]
+
+
+def generate(path: str, lines: int):
+    rnd = random.Random(42)
+    with open(path, "w", encoding="utf-8") as f:
+        for n in range(lines):
+            f.write(rnd.choice(_LINES).format(n=n) + "\n")
+
+
+def measure(fn):
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    first, count = None, 0
+    for _ in fn():
+        if first is None:
+            first = time.perf_counter() - t0
+        count += 1
+    total = time.perf_counter() - t0
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return {"tracks": count, "first_ms": round((first or 0) * 1000, 2),
+            "total_s": round(total, 3), "peak_mb": round(peak / 1024 ** 2, 1)}
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--lines", type=int, default=1_000_000)
+    args = ap.parse_args()
+
+    fd, path = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+    try:
+        generate(path, args.lines)
+        print(f"{args.lines} lines, {os.path.getsize(path) / 1024 ** 2:.1f} MB")
+        for name, fn in (
+            ("iter_playlist", lambda: iter_playlist(path)),
+            ("parse_playlist", lambda: parse_playlist(path)),
+        ):
+            r = measure(fn)
+            print(f"{name:<15} first {r['first_ms']:>8} ms  total {r['total_s']:>7} s  "
+                  f"peak {r['peak_mb']:>7} MB  ({r['tracks']} tracks)")
+    finally:
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+# Офлайн-бенчмарк движка: вместо YouTube — локальный HTTP-сервер с синтетическим аудио.
+#   python benchmarks/throughput.py [--tracks 20] [--threads 1,4,8] [--size-kb 512]
+#       [--latency-ms 50] [--bandwidth-kbps 4000] [--fail-rate 0.05] [--out run.json] [--baseline old.json]
+# Каждая комбинация потоков, умного поиска и тегов идёт в отдельном процессе.
+# Код выхода 1 — tracks/min упал больше чем на --tolerance относительно --baseline.
+import argparse
+import itertools
+import json
+import math
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.parse
+import urllib.request
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CHUNK = 16 * 1024
+BITRATE_KBPS = 96
+
+
+def synth_audio(size_kb: int) -> tuple[bytes, float]:
+    # Синус в Opus/WebM нужной длины — ffmpeg в движке работает с настоящим файлом
+    duration = max(1.0, size_kb * 8 / BITRATE_KBPS)
+    data = subprocess.run(
+        ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "lavfi",
+         "-i", f"sine=frequency=440:duration={duration}", "-c:a", "libopus", "-b:a", f"{BITRATE_KBPS}k",
+         "-f", "webm", "pipe:1"],
+        capture_output=True, check=True,
+    ).stdout
+    return data, duration
+
+
+class FakeSource(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, audio: bytes, duration: float, latency: float, search_latency: float,
+                 bandwidth: float, fail_rate: float, seed: int = 42):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.audio = audio
+        self.duration = duration
+        self.latency = latency
+        self.search_latency = search_latency
+        self.bandwidth = bandwidth
+        self.fail_rate = fail_rate
+        self._rnd = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @property
+    def base(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def should_fail(self) -> bool:
+        with self._lock:
+            return self._rnd.random() < self.fail_rate
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, *args):
+        pass
+
+    def do_HEAD(self):
+        self._media(body=False)
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        if url.path == "/search":
+            self._search(urllib.parse.parse_qs(url.query))
+        elif url.path.startswith("/media/"):
+            self._media(body=True)
+        else:
+            self.send_error(404)
+
+    def _search(self, qs: dict):
+        src = self.server
+        time.sleep(src.search_latency)
+        query = qs.get("q", [""])[0]
+        n = int(qs.get("n", ["5"])[0])
+        key = zlib.crc32(query.encode())
+        entries = [
+            {"id": f"v{key}x{i}", "url": f"{src.base}/media/v{key}x{i}.webm", "title": query,
+             "channel": query.split(" - ")[0], "duration": src.duration, "view_count": 1000 - i}
+            for i in range(n)
+        ]
+        self._send(200, "application/json", json.dumps(entries).encode())
+
+    def _media(self, body: bool):
+        src = self.server
+        time.sleep(src.latency)
+        if src.should_fail():
+            self._send(503, "text/plain", b"unavailable")
+            return
+        data = src.audio
+        self.send_response(200)
+        self.send_header("Content-Type", "audio/webm")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        if not body:
+            return
+        try:
+            for i in range(0, len(data), CHUNK):
+                self.wfile.write(data[i:i + CHUNK])
+                if src.bandwidth:
+                    time.sleep(CHUNK / src.bandwidth)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def _send(self, code: int, ctype: str, data: bytes):
+        self.send_response(code)
+        self.send_header("Content-Type", ctype)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+def percentile(values: list[float], p: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[max(0, math.ceil(p / 100 * len(values)) - 1)]
+
+
+def run_child(spec: dict):
+    # Отдельный процесс: свои пулы, база и библиотека, CPU считается без сервера
+    sys.path.insert(0, ROOT)
+    from melodine.config import AppConfig
+    from melodine.database import init_db
+    from melodine.downloader import DownloadEngine
+    from melodine.search import entry_to_result
+    from melodine.themes import get_theme
+
+    base = spec["base"]
+
+    class BenchEngine(DownloadEngine):
+        # Подменяет только точки входа в сеть: поиск и фильтр длительности generic-экстрактора
+        def _search_many(self, query: str) -> list[dict]:
+            n = self.config.download.search_candidates
+            url = f"{base}/search?" + urllib.parse.urlencode({"q": query, "n": n})
+            with urllib.request.urlopen(url, timeout=30) as resp:
+                return [entry_to_result(e) for e in json.load(resp)]
+
+        def _fetch_opts(self, output_dir: str) -> dict:
+            return {**super()._fetch_opts(output_dir), "match_filter": None}
+
+    os.chdir(tempfile.mkdtemp(prefix="melodine-bench-"))
+    config = AppConfig()
+    d = config.download
+    d.threads = spec["threads"]
+    d.smart_search = spec["smart_search"]
+    d.rate_limit = 0
+    d.retry_delay = 0.2
+    d.dedup = False
+    d.incremental_sync = False
+    d.cache_ttl_days = 0
+    d.codec = spec["codec"]
+    config.metadata.add_tags = spec["tags"]
+    config.paths.output = "out"
+    init_db()
+
+    latencies, stages = [], {}
+
+    def report(res):
+        if res.status != "success":
+            return
+        latencies.append(sum(v for k, v in res.timings.items() if k not in ("ttfb", "bytes_per_sec")))
+        for k, v in res.timings.items():
+            stages.setdefault(k, []).append(v)
+
+    tracks = [
+        {"artist": f"Artist {i}", "title": f"Track {i}", "query": f"Artist {i} - Track {i}"}
+        for i in range(spec["tracks"])
+    ]
+    engine = BenchEngine(config, get_theme("dracula"), reporter=report)
+    cpu0, t0 = os.times(), time.perf_counter()
+    result = engine.download_playlist(tracks)
+    elapsed = time.perf_counter() - t0
+    cpu1 = os.times()
+    # С учётом дочерних ffmpeg
+    cpu = sum(cpu1[i] - cpu0[i] for i in range(4))
+
+    print(json.dumps({
+        "threads": spec["threads"], "smart_search": spec["smart_search"], "tags": spec["tags"],
+        "success": result["success"], "failed": result["failed"], "retried": result["retried"],
+        "elapsed": round(elapsed, 3),
+        "tracks_per_min": round(result["success"] / elapsed * 60, 2) if elapsed else 0,
+        "cpu_seconds": round(cpu, 3),
+        "cpu_percent": round(cpu / elapsed * 100, 1) if elapsed else 0,
+        "p50_latency": round(percentile(latencies, 50), 4),
+        "p95_latency": round(percentile(latencies, 95), 4),
+        "stage_p95": {k: round(percentile(v, 95), 4) for k, v in sorted(stages.items())},
+    }))
+
+
+def commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ""
+
+
+def compare(report: dict, baseline_path: str, tolerance: float) -> bool:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    if baseline.get("source") != report["source"]:
+        print("  baseline was measured with different --size/--latency/... settings", file=sys.stderr)
+    old = {(r["threads"], r["smart_search"], r["tags"]): r for r in baseline["runs"]}
+    runs = report["runs"]
+    ok = True
+    for r in runs:
+        prev = old.get((r["threads"], r["smart_search"], r["tags"]))
+        if not prev or not prev["tracks_per_min"]:
+            continue
+        delta = r["tracks_per_min"] / prev["tracks_per_min"] - 1
+        flag = ""
+        if delta < -tolerance:
+            flag, ok = "  REGRESSION", False
+        print(f"  threads={r['threads']:<3} smart={r['smart_search']!s:<5} tags={r['tags']!s:<5} "
+              f"{prev['tracks_per_min']:>8.1f} → {r['tracks_per_min']:>8.1f} /min ({delta:+.1%}){flag}",
+              file=sys.stderr)
+    return ok
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--tracks", type=int, default=20)
+    ap.add_argument("--threads", default="1,4,8", help="comma-separated thread counts")
+    ap.add_argument("--smart-search", choices=("on", "off", "both"), default="both")
+    ap.add_argument("--tags", choices=("on", "off", "both"), default="both")
+    ap.add_argument("--codec", choices=("mp3", "native"), default="mp3")
+    ap.add_argument("--size-kb", type=int, default=512, help="synthetic file size")
+    ap.add_argument("--latency-ms", type=float, default=50, help="delay before the first media byte")
+    ap.add_argument("--search-ms", type=float, default=80, help="search response delay")
+    ap.add_argument("--bandwidth-kbps", type=float, default=4000, help="per-connection, 0 — unlimited")
+    ap.add_argument("--fail-rate", type=float, default=0.0, help="share of media requests answered 503")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", help="write JSON here instead of stdout")
+    ap.add_argument("--baseline", help="previous JSON to compare tracks/min against")
+    ap.add_argument("--tolerance", type=float, default=0.1)
+    ap.add_argument("--child", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+
+    if args.child:
+        run_child(json.loads(args.child))
+        return
+
+    audio, duration = synth_audio(args.size_kb)
+    source = FakeSource(
+        audio, duration, args.latency_ms / 1000, args.search_ms / 1000,
+        args.bandwidth_kbps * 1024 / 8, args.fail_rate, args.seed,
+    )
+    threading.Thread(target=source.serve_forever, daemon=True).start()
+
+    both = {"on": (True,), "off": (False,), "both": (True, False)}
+    combos = itertools.product(
+        [int(n) for n in args.threads.split(",")], both[args.smart_search], both[args.tags],
+    )
+    runs = []
+    for threads, smart, tags in combos:
+        spec = {"base": source.base, "tracks": args.tracks, "threads": threads,
+                "smart_search": smart, "tags": tags, "codec": args.codec}
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", json.dumps(spec)],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        run = json.loads(out.strip().splitlines()[-1])
+        runs.append(run)
+        print(f"threads={threads:<3} smart={smart!s:<5} tags={tags!s:<5} "
+              f"{run['tracks_per_min']:>8.1f} /min  cpu {run['cpu_percent']:>5.1f}%  "
+              f"p95 {run['p95_latency']:.2f} s  failed {run['failed']}", file=sys.stderr)
+    source.shutdown()
+
+    report = {
+        "commit": commit(), "python": platform.python_version(), "cpus": os.cpu_count(),
+        "source": {"tracks": args.tracks, "size_kb": len(audio) // 1024, "latency_ms": args.latency_ms,
+                   "search_ms": args.search_ms, "bandwidth_kbps": args.bandwidth_kbps,
+                   "fail_rate": args.fail_rate, "codec": args.codec, "seed": args.seed},
+        "runs": runs,
+    }
+    text = json.dumps(report, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline and not compare(report, args.baseline, args.tolerance):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
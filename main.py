@@ -3,6 +3,11 @@
 import sys
 
 def main():
+    # С аргументами — режим без интерфейса: melodine download PLAYLIST ...
+    if len(sys.argv) > 1:
+        from melodine.cli import main as cli_main
+        sys.exit(cli_main(sys.argv[1:]))
+
     try:
         from melodine.app import MelodineApp
         app = MelodineApp()
@@ -1,6 +1,5 @@
 import os, sys, signal
-from InquirerPy import inquirer
-from InquirerPy.separator import Separator
+from melodine.lazy import LazyModule
 
 from melodine.config import load_config, save_config, reset_config, CONFIG_PATH
 from melodine.themes import get_theme, list_themes
@@ -10,10 +9,20 @@ from melodine.display import (
     show_download_result, show_stats, show_failed_tracks,
     show_search_results, show_config, show_message, wait_enter,
 )
-from melodine.database import init_db, get_stats, get_failed_count, get_failed_tracks, record_session
+from melodine.database import (
+    init_db, get_stats, get_failed_count, get_failed_tracks,
+    start_session, finish_session, close_session, get_resumable_session, get_unfinished_jobs,
+    get_settled_queries, get_line_fingerprints, add_line_fingerprints, save_resolution,
+)
 from melodine.downloader import DownloadEngine
 from melodine.search import search_tracks, format_duration
-from melodine.utils import parse_playlist, sanitize_filename
+from melodine.library import LibraryIndex
+from melodine.sync import PlaylistSync
+from melodine.watcher import PlaylistWatcher
+from melodine.utils import iter_playlist, line_fingerprint, normalize_query, setup_logging
+
+inquirer = LazyModule("InquirerPy.inquirer")
+separator = LazyModule("InquirerPy.separator")
 
 
 def _v_int(lo, hi):
@@ -40,6 +49,7 @@ class MelodineApp:
         self.config = load_config()
         self.theme = get_theme(self.config.theme)
         set_language(self.config.language)
+        setup_logging(self.config.paths.log_file)
         init_db()
 
     def run(self):
@@ -78,16 +88,20 @@ class MelodineApp:
         fc = get_failed_count()
         retry_label = t("menu_retry_n", n=fc) if fc else t("menu_retry")
 
+        choices = [{"name": t("menu_download"), "value": "download"}]
+        if get_resumable_session():
+            choices.append({"name": t("menu_resume"), "value": "resume"})
+        choices.append({"name": t("menu_watch"), "value": "watch"})
+
         action = inquirer.select(
             message=t("menu_prompt"),
-            choices=[
-                {"name": t("menu_download"), "value": "download"},
+            choices=choices + [
                 {"name": retry_label, "value": "retry", "disabled": t("menu_retry_disabled") if not fc else False},
                 {"name": t("menu_search"), "value": "search"},
-                Separator(),
+                separator.Separator(),
                 {"name": t("menu_stats"), "value": "stats"},
                 {"name": t("menu_settings"), "value": "settings"},
-                Separator(),
+                separator.Separator(),
                 {"name": t("menu_exit"), "value": "exit"},
             ],
             pointer="❯", qmark="🎵", amark="🎵",
@@ -96,6 +110,8 @@ class MelodineApp:
         handlers = {
             "download": self._download_playlist,
             "retry": self._retry_failed,
+            "resume": self.resume,
+            "watch": self._watch,
             "search": self._search_track,
             "stats": self._show_stats,
             "settings": self._settings_menu,
@@ -123,31 +139,73 @@ class MelodineApp:
             only_files=True,
         ).execute()
 
-        tracks = parse_playlist(filepath)
-        if not tracks:
-            show_message(self.theme, t("dl_no_tracks"), "error")
+        incremental = self.config.download.incremental_sync
+        library = LibraryIndex(self.config.paths.output)
+        sync = PlaylistSync(filepath, library, incremental)
+        if sync.unchanged:
+            show_message(self.theme, t("sync_unchanged"), "success")
             wait_enter(self.theme)
             return
 
-        out = self.config.paths.output
-        new = sum(1 for tr in tracks if not os.path.exists(
-            os.path.join(out, f"{self._fname(tr)}.mp3")
-        ))
+        library.scan()
+        sync.scan()
+        if not sync.total:
+            show_message(self.theme, t("dl_no_tracks"), "error")
+            wait_enter(self.theme)
+            return
 
         draw_header(self.theme)
-        show_playlist_info(self.theme, filepath, len(tracks), new)
+        show_playlist_info(self.theme, sync.filepath, sync.total, sync.new,
+                           changed=sync.queued if sync.last else None, removed=len(sync.removed))
 
-        if new == 0:
+        if sync.new == 0:
+            if incremental:
+                sync.record()
             show_message(self.theme, t("dl_all_done"), "success")
             wait_enter(self.theme)
             return
 
         if not inquirer.confirm(
-            message=t("dl_confirm", n=new), default=True, qmark="⬇️ ", amark="⬇️ ",
+            message=t("dl_confirm", n=sync.new), default=True, qmark="⬇️ ", amark="⬇️ ",
         ).execute():
             return
 
-        self._run_download(tracks, filepath)
+        self._run_download(sync.tracks(), sync.filepath, library=library, total=sync.queued,
+                           on_done=sync.record if incremental else None)
+
+    def _watch(self):
+        draw_header(self.theme)
+        console.print(f"[{self.theme.subtitle}]{t('watch_title')}[/]\n")
+
+        os.makedirs(self.config.paths.watch_dir, exist_ok=True)
+        target = inquirer.filepath(
+            message=t("watch_path"), default=self.config.paths.watch_dir, qmark="👁 ", amark="👁 ",
+            validate=lambda p: os.path.exists(p), invalid_message=t("dl_file_not_found"),
+        ).execute()
+        self.config.paths.watch_dir = target
+        save_config(self.config)
+
+        cfg = self.config.download
+        console.print(f"[{self.theme.muted}]{t('watch_hint', s=cfg.watch_interval)}[/]\n")
+
+        # Один движок на всё время слежения: новые строки идут в уже работающий конвейер
+        source = os.path.abspath(target)
+        session_id = start_session(source, 0)
+        engine = DownloadEngine(self.config, self.theme, session_id=session_id)
+        watcher = PlaylistWatcher(
+            [target], lambda: engine.stopped, cfg.watch_interval,
+            known=get_line_fingerprints if cfg.incremental_sync else None,
+        )
+
+        def record_sync(session_id, result):
+            settled = {line_fingerprint({"query": q}) for q in get_settled_queries(session_id)}
+            for path, fps in watcher.queued.items():
+                add_line_fingerprints(path, fps & settled)
+
+        # Из слежения выходят только по Ctrl+C — это штатное завершение, а не обрыв:
+        # сессию не предлагаем докачать, недокачанное подхватит следующий запуск слежения
+        self._run_download(watcher, source, session_id=session_id, engine=engine,
+                           on_done=record_sync if cfg.incremental_sync else None, stop_status="done")
 
     def _retry_failed(self):
         draw_header(self.theme)
@@ -167,8 +225,46 @@ class MelodineApp:
         ).execute():
             self._run_download(failed, "retry")
 
-    def _run_download(self, tracks, source=""):
-        engine = DownloadEngine(self.config, self.theme)
+    def resume(self):
+        draw_header(self.theme)
+        console.print(f"[{self.theme.subtitle}]{t('resume_title')}[/]\n")
+
+        session = get_resumable_session()
+        tracks = self._resume_tracks(session) if session else []
+        if not tracks:
+            if session:
+                close_session(session["id"])
+            show_message(self.theme, t("resume_none"), "success")
+            wait_enter(self.theme)
+            return
+
+        show_message(self.theme, t("resume_found", file=session["playlist_file"], n=len(tracks)), "info")
+        console.print()
+
+        if inquirer.confirm(
+            message=t("resume_confirm", n=len(tracks)), default=True, qmark="▶️ ", amark="▶️ ",
+        ).execute():
+            self._run_download(tracks, session["playlist_file"], session_id=session["id"])
+
+    @staticmethod
+    def _resume_tracks(session: dict) -> list[dict]:
+        tracks = get_unfinished_jobs(session["id"])
+        # Строки плейлиста, до которых прерванный запуск не успел дойти
+        src = session["playlist_file"]
+        if src and os.path.isfile(src):
+            for pos, tr in enumerate(iter_playlist(src)):
+                if pos > session["last_position"]:
+                    tracks.append({**tr, "position": pos})
+        return tracks
+
+    def _run_download(self, tracks, source="", session_id=0, library=None, total=None, on_done=None,
+                      engine=None, stop_status="interrupted"):
+        if total is None and hasattr(tracks, "__len__"):
+            total = len(tracks)
+        if not session_id:
+            session_id = start_session(source, total or 0)
+        if engine is None:
+            engine = DownloadEngine(self.config, self.theme, session_id=session_id, library=library)
         orig_handler = signal.getsignal(signal.SIGINT)
 
         def on_interrupt(sig, frame):
@@ -177,7 +273,7 @@ class MelodineApp:
 
         signal.signal(signal.SIGINT, on_interrupt)
         try:
-            result = engine.download_playlist(tracks)
+            result = engine.download_playlist(tracks, total=total)
         finally:
             signal.signal(signal.SIGINT, orig_handler)
 
@@ -187,15 +283,21 @@ class MelodineApp:
             success=result["success"], failed=result["failed"],
             skipped=result["skipped"], retried=result["retried"],
             total=result["total"], elapsed=result["elapsed"],
-            total_size=result["total_size"],
+            total_size=result["total_size"], stages=result.get("stages"),
+            deduped=result.get("deduped", 0),
         )
 
-        record_session(
-            playlist_file=source, total=result["total"],
+        finish_session(
+            session_id,
             success=result["success"], failed=result["failed"],
             skipped=result["skipped"], total_size=result["total_size"],
             duration_seconds=result["elapsed"],
+            status=stop_status if engine.stopped else "done",
         )
+        if on_done:
+            on_done(session_id, result)
+        for path in result.get("profile", []):
+            console.print(f"[{self.theme.muted}]{t('profile_saved', path=path)}[/]")
 
         if result["failed_list"]:
             console.print()
@@ -264,6 +366,13 @@ class MelodineApp:
             return
 
         info = results[sel]
+        # В кэш идёт только выбранный вручную результат — его же возьмёт движок для этой строки
+        if self.config.download.cache_ttl_days and info["id"]:
+            try:
+                save_resolution(normalize_query(query), info["id"], info["url"],
+                                info["duration"], info["channel"])
+            except Exception:
+                pass
         self._run_download(
             [{"query": info["url"], "artist": info["channel"], "title": info["title"]}],
             "search",
@@ -297,7 +406,7 @@ class MelodineApp:
                     {"name": t("settings_lang"), "value": "lang"},
                     {"name": t("settings_show"), "value": "show"},
                     {"name": t("settings_reset"), "value": "reset"},
-                    Separator(),
+                    separator.Separator(),
                     {"name": t("settings_back"), "value": "back"},
                 ],
                 pointer="❯", qmark="⚙️ ", amark="⚙️ ",
@@ -326,13 +435,61 @@ class MelodineApp:
         cfg.threads = int(inquirer.text(
             message=t("cfg_threads", v=cfg.threads), default=str(cfg.threads),
             qmark="⚡", amark="⚡",
-            validate=_v_int(1, 15), invalid_message=t("cfg_threads_err"),
+            validate=_v_int(1, 64), invalid_message=t("cfg_threads_err"),
+        ).execute())
+
+        cfg.threads_auto = inquirer.confirm(
+            message=t("cfg_threads_auto"), default=cfg.threads_auto, qmark="🤖", amark="🤖",
+        ).execute()
+
+        if cfg.threads_auto:
+            cfg.threads_min = int(inquirer.text(
+                message=t("cfg_threads_min", v=cfg.threads_min), default=str(cfg.threads_min),
+                qmark="⬇️ ", amark="⬇️ ",
+                validate=_v_int(1, 64), invalid_message=t("cfg_threads_err"),
+            ).execute())
+
+            cfg.threads_max = int(inquirer.text(
+                message=t("cfg_threads_max", v=cfg.threads_max), default=str(cfg.threads_max),
+                qmark="⬆️ ", amark="⬆️ ",
+                validate=lambda v: _v_int(1, 64)(v) and int(v) >= cfg.threads_min,
+                invalid_message=t("cfg_threads_max_err"),
+            ).execute())
+
+        cfg.resolve_threads = int(inquirer.text(
+            message=t("cfg_resolve_threads", v=cfg.resolve_threads), default=str(cfg.resolve_threads),
+            qmark="🔎", amark="🔎",
+            validate=_v_int(1, 32), invalid_message=t("cfg_resolve_threads_err"),
         ).execute())
 
-        cfg.pause = float(inquirer.text(
-            message=t("cfg_pause", v=cfg.pause), default=str(cfg.pause),
+        cfg.transcode_threads = int(inquirer.text(
+            message=t("cfg_transcode_threads", v=cfg.transcode_threads), default=str(cfg.transcode_threads),
+            qmark="🎛 ", amark="🎛 ",
+            validate=_v_int(0, 64), invalid_message=t("cfg_transcode_threads_err"),
+        ).execute())
+
+        cfg.tag_threads = int(inquirer.text(
+            message=t("cfg_tag_threads", v=cfg.tag_threads), default=str(cfg.tag_threads),
+            qmark="🏷️ ", amark="🏷️ ",
+            validate=_v_int(1, 16), invalid_message=t("cfg_tag_threads_err"),
+        ).execute())
+
+        cfg.queue_size = int(inquirer.text(
+            message=t("cfg_queue_size", v=cfg.queue_size), default=str(cfg.queue_size),
+            qmark="📥", amark="📥",
+            validate=_v_int(1, 1024), invalid_message=t("cfg_queue_size_err"),
+        ).execute())
+
+        cfg.rate_limit = float(inquirer.text(
+            message=t("cfg_rate", v=cfg.rate_limit), default=str(cfg.rate_limit),
             qmark="⏱ ", amark="⏱ ",
-            validate=_v_float(0, 10), invalid_message=t("cfg_pause_err"),
+            validate=_v_float(0, 100), invalid_message=t("cfg_rate_err"),
+        ).execute())
+
+        cfg.rate_burst = int(inquirer.text(
+            message=t("cfg_burst", v=cfg.rate_burst), default=str(cfg.rate_burst),
+            qmark="💨", amark="💨",
+            validate=_v_int(1, 100), invalid_message=t("cfg_burst_err"),
         ).execute())
 
         cfg.retry_attempts = int(inquirer.text(
@@ -347,6 +504,15 @@ class MelodineApp:
             validate=_v_float(0, 60), invalid_message=t("cfg_retry_delay_err"),
         ).execute())
 
+        cfg.codec = inquirer.select(
+            message=t("cfg_codec"),
+            choices=[
+                {"name": t("cfg_codec_mp3"), "value": "mp3"},
+                {"name": t("cfg_codec_native"), "value": "native"},
+            ],
+            default=cfg.codec, qmark="🎼", amark="🎼",
+        ).execute()
+
         cfg.quality = int(inquirer.select(
             message=t("cfg_quality"),
             choices=["320", "256", "192", "128"], default=str(cfg.quality),
@@ -365,10 +531,62 @@ class MelodineApp:
             validate=_v_int(5, 120), invalid_message=t("cfg_timeout_err"),
         ).execute())
 
+        cfg.cache_ttl_days = int(inquirer.text(
+            message=t("cfg_cache_ttl", v=cfg.cache_ttl_days), default=str(cfg.cache_ttl_days),
+            qmark="🗃 ", amark="🗃 ",
+            validate=_v_int(0, 365), invalid_message=t("cfg_cache_ttl_err"),
+        ).execute())
+
         cfg.smart_search = inquirer.confirm(
             message=t("cfg_smart"), default=cfg.smart_search, qmark="🧠", amark="🧠",
         ).execute()
 
+        cfg.dedup = inquirer.confirm(
+            message=t("cfg_dedup"), default=cfg.dedup, qmark="🔗", amark="🔗",
+        ).execute()
+
+        cfg.incremental_sync = inquirer.confirm(
+            message=t("cfg_sync"), default=cfg.incremental_sync, qmark="🔁", amark="🔁",
+        ).execute()
+
+        cfg.progress = inquirer.select(
+            message=t("cfg_progress"),
+            choices=[
+                {"name": t("cfg_progress_auto"), "value": "auto"},
+                {"name": t("cfg_progress_rich"), "value": "rich"},
+                {"name": t("cfg_progress_plain"), "value": "plain"},
+            ],
+            default=cfg.progress, qmark="📊", amark="📊",
+        ).execute()
+
+        cfg.watch_interval = float(inquirer.text(
+            message=t("cfg_watch_interval", v=cfg.watch_interval), default=str(cfg.watch_interval),
+            qmark="👁 ", amark="👁 ",
+            validate=_v_float(0.5, 3600), invalid_message=t("cfg_watch_interval_err"),
+        ).execute())
+
+        cfg.profile = inquirer.confirm(
+            message=t("cfg_profile"), default=cfg.profile, qmark="🧪", amark="🧪",
+        ).execute()
+
+        cfg.metrics_port = int(inquirer.text(
+            message=t("cfg_metrics_port", v=cfg.metrics_port), default=str(cfg.metrics_port),
+            qmark="📡", amark="📡",
+            validate=_v_int(0, 65535), invalid_message=t("cfg_metrics_port_err"),
+        ).execute())
+
+        cfg.search_candidates = int(inquirer.text(
+            message=t("cfg_candidates", v=cfg.search_candidates), default=str(cfg.search_candidates),
+            qmark="🎯", amark="🎯",
+            validate=_v_int(1, 20), invalid_message=t("cfg_candidates_err"),
+        ).execute())
+
+        cfg.match_threshold = float(inquirer.text(
+            message=t("cfg_match_threshold", v=cfg.match_threshold), default=str(cfg.match_threshold),
+            qmark="🎯", amark="🎯",
+            validate=_v_float(0, 1), invalid_message=t("cfg_match_threshold_err"),
+        ).execute())
+
         self.config.download = cfg
         save_config(self.config)
         console.print(f"\n[{self.theme.success}]{t('settings_saved')}[/]")
@@ -467,12 +685,6 @@ class MelodineApp:
 
     # --- helpers ---
 
-    @staticmethod
-    def _fname(track):
-        a = track.get("artist", "")
-        ti = track.get("title", "")
-        return sanitize_filename(f"{a} - {ti}" if a else ti)
-
     @staticmethod
     def _open_folder(path):
         import subprocess
@@ -0,0 +1,187 @@
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+
+from melodine.locales import t, set_language
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+EXIT_INTERRUPTED = 130
+
+_ICONS = {"success": "✅", "skipped": "⏭", "failed": "❌"}
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="melodine", description="Melodine headless mode")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    dl = sub.add_parser("download", help="download a playlist file")
+    dl.add_argument("playlist")
+    dl.add_argument("-o", "--output")
+    dl.add_argument("-t", "--threads", type=int)
+    dl.add_argument("--threads-auto", action="store_true", default=None)
+    dl.add_argument("--codec", choices=("mp3", "native"))
+    dl.add_argument("--quality", type=int)
+    dl.add_argument("--rate-limit", type=float)
+    dl.add_argument("--retries", type=int)
+    dl.add_argument("--no-smart-search", action="store_true")
+    dl.add_argument("--no-tags", action="store_true")
+    dl.add_argument("--full", action="store_true", help="ignore incremental sync and check every line")
+    dl.add_argument("--json", action="store_true", help="line-delimited JSON progress on stdout")
+    dl.add_argument("--profile", action="store_true", help="sample stacks and write a stage trace")
+    dl.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on 127.0.0.1:PORT")
+    return parser
+
+
+def _apply_args(config, args):
+    d = config.download
+    overrides = {
+        "threads": args.threads, "threads_auto": args.threads_auto, "codec": args.codec,
+        "quality": args.quality, "rate_limit": args.rate_limit, "retry_attempts": args.retries,
+        "metrics_port": args.metrics_port,
+    }
+    for key, val in overrides.items():
+        if val is not None:
+            setattr(d, key, val)
+    if args.no_smart_search:
+        d.smart_search = False
+    if args.full:
+        d.incremental_sync = False
+    if args.no_tags:
+        config.metadata.add_tags = False
+    if args.profile:
+        d.profile = True
+    if args.output:
+        config.paths.output = args.output
+    # Значения из командной строки проверяются так же, как и из config.yaml
+    type(d).model_validate(d.model_dump())
+
+
+_out = threading.Lock()
+
+
+def _emit(event: str, **fields):
+    # События пишет и фоновый подсчёт — строки не должны перемешиваться
+    with _out:
+        print(json.dumps({"event": event, **fields}, ensure_ascii=False), flush=True)
+
+
+def download(args) -> int:
+    # Тяжёлые модули — после разбора аргументов, чтобы --help и ошибки были мгновенными
+    from melodine.config import load_config
+    from melodine.themes import get_theme
+    from melodine.database import init_db, start_session, finish_session
+    from melodine.downloader import DownloadEngine
+    from melodine.library import LibraryIndex
+    from melodine.sync import PlaylistSync
+    from melodine.utils import setup_logging, format_size, format_time
+
+    config = load_config()
+    try:
+        _apply_args(config, args)
+    except ValueError as e:
+        print(f"melodine: {e}", file=sys.stderr)
+        return EXIT_USAGE
+    set_language(config.language)
+    setup_logging(config.paths.log_file)
+    init_db()
+
+    if not os.path.isfile(args.playlist):
+        print(f"melodine: {t('dl_file_not_found')}: {args.playlist}", file=sys.stderr)
+        return EXIT_USAGE
+
+    incremental = config.download.incremental_sync
+    library = LibraryIndex(config.paths.output)
+    sync = PlaylistSync(args.playlist, library, incremental)
+
+    # Плейлист не сканируется заранее: строки идут в движок по мере чтения,
+    # а итоги для прогресса считает отдельный проход в фоне
+    if args.json:
+        _emit("start", playlist=sync.filepath, total=None, queued=None,
+              new=None, removed=None, unchanged=sync.unchanged)
+    if sync.unchanged:
+        if args.json:
+            _emit("summary", success=0, failed=0, skipped=0, total=0, stopped=False)
+        else:
+            print(t("sync_unchanged"))
+        return EXIT_OK
+    library.scan()
+
+    counts = {}
+
+    def count():
+        try:
+            counts["total"], counts["queued"] = sync.count()
+        except Exception:
+            # Ошибку чтения сообщит основной проход
+            return
+        if args.json:
+            _emit("count", **counts)
+
+    threading.Thread(target=count, name="count", daemon=True).start()
+    done = 0
+
+    def report(res):
+        nonlocal done
+        done += 1
+        if args.json:
+            _emit("track", n=done, query=res.query, artist=res.artist, title=res.title,
+                  status=res.status, attempts=res.attempts, file=res.file_path or None,
+                  size=res.file_size, error=res.error or None)
+        else:
+            progress = f"{done}/{counts['queued']}" if "queued" in counts else str(done)
+            line = f"{_ICONS.get(res.status, '?')} [{progress}] {res.query}"
+            print(line + (f" — {res.error}" if res.status == "failed" and res.error else ""), flush=True)
+
+    session_id = start_session(sync.filepath, 0)
+    engine = DownloadEngine(config, get_theme(config.theme), session_id=session_id,
+                            library=library, reporter=report)
+    signal.signal(signal.SIGINT, lambda sig, frame: engine.stop())
+    try:
+        result = engine.download_playlist(sync.tracks())
+    except Exception as e:
+        # Например, плейлист не читается дальше какой-то строки: сессия остаётся
+        # незавершённой, а файл — несинхронизированным, чтобы их можно было докачать
+        print(f"melodine: {e}", file=sys.stderr)
+        return EXIT_FAILED
+
+    finish_session(
+        session_id,
+        success=result["success"], failed=result["failed"],
+        skipped=result["skipped"], total_size=result["total_size"],
+        duration_seconds=result["elapsed"],
+        status="interrupted" if engine.stopped else "done",
+    )
+    if incremental:
+        sync.record(session_id, result)
+    if result["failed_list"]:
+        with open(config.paths.failed_log, "w", encoding="utf-8") as f:
+            f.write("\n".join(result["failed_list"]) + "\n")
+
+    if args.json:
+        _emit("summary", **{k: v for k, v in result.items() if k != "stages"},
+              stages=result["stages"], session_id=session_id)
+    else:
+        print(
+            f"{t('result_ok')} {result['success']} / {result['total']}  "
+            f"{t('result_fail')} {result['failed']}  {t('result_skip')} {result['skipped']}  "
+            f"{t('result_time')} {format_time(result['elapsed'])}  "
+            f"{t('result_size')} {format_size(result['total_size'])}"
+        )
+        for path in result.get("profile", []):
+            print(t("profile_saved", path=path))
+
+    if result["stopped"]:
+        return EXIT_INTERRUPTED
+    return EXIT_FAILED if result["failed"] else EXIT_OK
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.command == "download":
+        return download(args)
+    return EXIT_USAGE
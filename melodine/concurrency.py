@@ -0,0 +1,88 @@
+import logging
+import time
+from threading import Lock
+
+log = logging.getLogger("melodine")
+
+
+# AIMD: пока пропускная способность растёт — +1 поток,
+# при ошибках, троттлинге или росте задержки — уменьшаем резко.
+class AIMDController:
+    def __init__(self, apply, start: int, lo: int, hi: int,
+                 window: float = 10.0, min_samples: int = 4):
+        self.lo = max(1, min(lo, hi))
+        self.hi = max(hi, self.lo)
+        self.limit = max(self.lo, min(start, self.hi))
+        self.window = window
+        self.min_samples = min_samples
+        self.last_decision = ""
+        self._apply = apply
+        self._best_rate = 0.0
+        self._base_latency = 0.0
+        self._lock = Lock()
+        self._reset(time.monotonic())
+        apply(self.limit)
+
+    def observe(self, ok: bool, latency: float, throttled: bool = False):
+        with self._lock:
+            self._n += 1
+            if ok:
+                self._ok += 1
+                self._latency += latency
+            elif throttled:
+                self._throttled += 1
+            else:
+                self._errors += 1
+
+            now = time.monotonic()
+            span = now - self._t0
+            if span < self.window or self._n < self.min_samples:
+                return
+            self._decide(span)
+            self._reset(now)
+
+    def _reset(self, now: float):
+        self._t0 = now
+        self._n = self._ok = self._errors = self._throttled = 0
+        self._latency = 0.0
+
+    def _decide(self, span: float):
+        rate = self._ok / span
+        latency = self._latency / self._ok if self._ok else 0.0
+        err_rate = self._errors / self._n
+        old = self.limit
+
+        if self._throttled:
+            new, reason = old // 2, "throttled"
+        elif err_rate > 0.2:
+            new, reason = old // 2, "errors"
+        elif self._base_latency and latency > self._base_latency * 2:
+            new, reason = old * 3 // 4, "latency"
+        elif rate > self._best_rate * 1.05:
+            new, reason = old + 1, "throughput up"
+        elif self._base_latency and latency > self._base_latency * 1.25:
+            # Скорость не растёт, а треки качаются дольше — потоки лишние
+            new, reason = old - 1, "plateau, latency up"
+        else:
+            new, reason = old, "plateau"
+            # Планка медленно забывается, чтобы периодически пробовать снова
+            self._best_rate *= 0.98
+
+        new = max(self.lo, min(new, self.hi))
+        if new < old - 1:
+            # После резкого сброса снова пробуем расти от нового уровня
+            self._best_rate = 0.0
+        elif reason == "throughput up":
+            self._best_rate = rate
+        if latency and (not self._base_latency or latency < self._base_latency):
+            self._base_latency = latency
+
+        self.limit = new
+        if new != old:
+            self._apply(new)
+
+        self.last_decision = (
+            f"{old} → {new}: {reason} "
+            f"({rate * 60:.1f}/min, err {err_rate:.0%}, {latency:.1f}s)"
+        )
+        log.info("threads %s", self.last_decision)
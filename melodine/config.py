@@ -1,5 +1,6 @@
 import os
 from pathlib import Path
+from typing import Literal
 import yaml
 from pydantic import BaseModel, Field
 
@@ -7,20 +8,41 @@ CONFIG_PATH = Path("config.yaml")
 
 
 class DownloadConfig(BaseModel):
-    threads: int = Field(default=4, ge=1, le=15)
-    pause: float = Field(default=0.5, ge=0.0, le=10.0)
+    threads: int = Field(default=4, ge=1, le=64)
+    threads_auto: bool = False
+    threads_min: int = Field(default=2, ge=1, le=64)
+    threads_max: int = Field(default=16, ge=1, le=64)
+    resolve_threads: int = Field(default=2, ge=1, le=32)
+    transcode_threads: int = Field(default=0, ge=0, le=64)  # 0 — по числу ядер
+    tag_threads: int = Field(default=1, ge=1, le=16)
+    queue_size: int = Field(default=16, ge=1, le=1024)
+    rate_limit: float = Field(default=2.0, ge=0.0, le=100.0)  # запросов в секунду, 0 — без лимита
+    rate_burst: int = Field(default=4, ge=1, le=100)
     retry_attempts: int = Field(default=3, ge=0, le=10)
     retry_delay: float = Field(default=5.0, ge=0.0, le=60.0)
+    codec: Literal["mp3", "native"] = "mp3"  # native — исходный Opus/AAC без перекодирования
     quality: int = Field(default=320)
     max_duration: int = Field(default=600, ge=60, le=3600)
     timeout: int = Field(default=30, ge=5, le=120)
     smart_search: bool = True
+    dedup: bool = True
+    incremental_sync: bool = True
+    progress: Literal["auto", "rich", "plain"] = "auto"  # plain — строка статуса раз в пару секунд
+    watch_interval: float = Field(default=5.0, ge=0.5, le=3600.0)  # опрос плейлистов в режиме слежения
+    profile: bool = False  # сэмплы стеков и трассировка этапов в paths.profile_dir
+    metrics_port: int = Field(default=0, ge=0, le=65535)  # Prometheus на 127.0.0.1, 0 — выключено
+    search_candidates: int = Field(default=5, ge=1, le=20)
+    match_threshold: float = Field(default=0.35, ge=0.0, le=1.0)  # ниже — берётся первый результат исходного запроса
+    cache_ttl_days: int = Field(default=30, ge=0, le=365)
     download_covers: bool = False
 
 
 class PathsConfig(BaseModel):
     output: str = "./downloads"
     failed_log: str = "./failed_tracks.txt"
+    log_file: str = "./melodine.log"
+    watch_dir: str = "./inbox"
+    profile_dir: str = "./profiles"
 
 
 class MetadataConfig(BaseModel):
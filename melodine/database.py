@@ -1,150 +1,581 @@
+import atexit
+import math
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from pathlib import Path
 
 DB_PATH = Path("melodine.db")
 
+# Записи копятся в одной транзакции и коммитятся пачкой
+BATCH_SIZE = 200
+BATCH_SECONDS = 1.0
 
-def get_connection() -> sqlite3.Connection:
-    conn = sqlite3.connect(str(DB_PATH))
-    conn.row_factory = sqlite3.Row
-    return conn
+_lock = threading.RLock()
+_conn: sqlite3.Connection | None = None
+_pending = 0
+_last_commit = 0.0
+_flusher_thread: threading.Thread | None = None
 
 
-def init_db() -> None:
-    conn = get_connection()
-    conn.executescript("""
-        CREATE TABLE IF NOT EXISTS downloads (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            query TEXT NOT NULL,
-            artist TEXT DEFAULT '',
-            title TEXT DEFAULT '',
-            status TEXT NOT NULL,
-            attempts INTEGER DEFAULT 1,
-            file_path TEXT DEFAULT '',
-            file_size INTEGER DEFAULT 0,
-            duration REAL DEFAULT 0,
-            downloaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE TABLE IF NOT EXISTS sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            playlist_file TEXT,
-            total_tracks INTEGER DEFAULT 0,
-            success INTEGER DEFAULT 0,
-            failed INTEGER DEFAULT 0,
-            skipped INTEGER DEFAULT 0,
-            total_size INTEGER DEFAULT 0,
-            duration_seconds REAL DEFAULT 0,
-            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        );
-
-        CREATE INDEX IF NOT EXISTS idx_downloads_status ON downloads(status);
-        CREATE INDEX IF NOT EXISTS idx_downloads_date ON downloads(downloaded_at);
-        CREATE INDEX IF NOT EXISTS idx_downloads_artist ON downloads(artist);
+@contextmanager
+def _db(write: bool = False, flush: bool = False):
+    # Одно долгоживущее соединение на процесс, доступ из потоков через блокировку
+    global _conn, _pending, _last_commit, _flusher_thread
+    with _lock:
+        if _conn is None:
+            _conn = sqlite3.connect(str(DB_PATH), timeout=30, check_same_thread=False)
+            _conn.row_factory = sqlite3.Row
+            _conn.execute("PRAGMA journal_mode=WAL")
+            _conn.execute("PRAGMA synchronous=NORMAL")
+            _last_commit = time.monotonic()
+            if _flusher_thread is None:
+                _flusher_thread = threading.Thread(target=_flusher, daemon=True)
+                _flusher_thread.start()
+        yield _conn
+        if write:
+            _pending += 1
+            if flush or _pending >= BATCH_SIZE or time.monotonic() - _last_commit >= BATCH_SECONDS:
+                _commit()
+
+
+def _commit() -> None:
+    global _pending, _last_commit
+    _conn.commit()
+    _pending = 0
+    _last_commit = time.monotonic()
+
+
+def _flusher() -> None:
+    while True:
+        time.sleep(BATCH_SECONDS)
+        flush()
+
+
+def flush() -> None:
+    with _lock:
+        if _conn is not None and _pending:
+            _commit()
+
+
+def close_db() -> None:
+    global _conn
+    with _lock:
+        if _conn is not None:
+            flush()
+            _conn.close()
+            _conn = None
+
+
+atexit.register(close_db)
+
+
+# Сводки для экрана статистики ведутся триггерами прямо при записи в downloads
+_ROLLUPS = """
+    CREATE TABLE IF NOT EXISTS stats_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        total INTEGER DEFAULT 0,
+        success INTEGER DEFAULT 0,
+        failed INTEGER DEFAULT 0,
+        total_size INTEGER DEFAULT 0
+    );
+
+    CREATE TABLE IF NOT EXISTS stats_daily (
+        day TEXT PRIMARY KEY,
+        success INTEGER DEFAULT 0
+    ) WITHOUT ROWID;
+
+    CREATE TABLE IF NOT EXISTS stats_artists (
+        artist TEXT PRIMARY KEY,
+        success INTEGER DEFAULT 0
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_stats_artists_success ON stats_artists(success);
+
+    -- Пересоздаются при каждом запуске: старые базы получают актуальные тела триггеров
+    DROP TRIGGER IF EXISTS trg_downloads_insert;
+    DROP TRIGGER IF EXISTS trg_downloads_update;
+    DROP TRIGGER IF EXISTS trg_downloads_delete;
+
+    CREATE TRIGGER trg_downloads_insert AFTER INSERT ON downloads BEGIN
+        UPDATE stats_totals SET total = total + 1,
+            success = success + (NEW.status = 'success'),
+            failed = failed + (NEW.status = 'failed'),
+            total_size = total_size + CASE WHEN NEW.status = 'success' THEN NEW.file_size ELSE 0 END;
+        INSERT INTO stats_daily (day, success) SELECT date(NEW.downloaded_at), 1
+            WHERE NEW.status = 'success'
+            ON CONFLICT(day) DO UPDATE SET success = success + 1;
+        INSERT INTO stats_artists (artist, success) SELECT NEW.artist, 1
+            WHERE NEW.status = 'success' AND NEW.artist != ''
+            ON CONFLICT(artist) DO UPDATE SET success = success + 1;
+    END;
+
+    CREATE TRIGGER trg_downloads_update AFTER UPDATE ON downloads BEGIN
+        UPDATE stats_totals SET
+            success = success - (OLD.status = 'success') + (NEW.status = 'success'),
+            failed = failed - (OLD.status = 'failed') + (NEW.status = 'failed'),
+            total_size = total_size - CASE WHEN OLD.status = 'success' THEN OLD.file_size ELSE 0 END
+                                    + CASE WHEN NEW.status = 'success' THEN NEW.file_size ELSE 0 END;
+        UPDATE stats_daily SET success = success - 1
+            WHERE OLD.status = 'success' AND day = date(OLD.downloaded_at);
+        UPDATE stats_artists SET success = success - 1
+            WHERE OLD.status = 'success' AND artist = OLD.artist;
+        INSERT INTO stats_daily (day, success) SELECT date(NEW.downloaded_at), 1
+            WHERE NEW.status = 'success'
+            ON CONFLICT(day) DO UPDATE SET success = success + 1;
+        INSERT INTO stats_artists (artist, success) SELECT NEW.artist, 1
+            WHERE NEW.status = 'success' AND NEW.artist != ''
+            ON CONFLICT(artist) DO UPDATE SET success = success + 1;
+    END;
+
+    CREATE TRIGGER trg_downloads_delete AFTER DELETE ON downloads BEGIN
+        UPDATE stats_totals SET total = total - 1,
+            success = success - (OLD.status = 'success'),
+            failed = failed - (OLD.status = 'failed'),
+            total_size = total_size - CASE WHEN OLD.status = 'success' THEN OLD.file_size ELSE 0 END;
+        UPDATE stats_daily SET success = success - 1
+            WHERE OLD.status = 'success' AND day = date(OLD.downloaded_at);
+        UPDATE stats_artists SET success = success - 1
+            WHERE OLD.status = 'success' AND artist = OLD.artist;
+    END;
+"""
+
+
+def _build_rollups(conn: sqlite3.Connection) -> None:
+    # Разовое заполнение сводок по уже накопленной истории
+    conn.execute("""
+        INSERT INTO stats_totals (id, total, success, failed, total_size)
+        SELECT 1, COUNT(*), COALESCE(SUM(status = 'success'), 0), COALESCE(SUM(status = 'failed'), 0),
+               COALESCE(SUM(CASE WHEN status = 'success' THEN file_size ELSE 0 END), 0)
+        FROM downloads
+    """)
+    conn.execute("""
+        INSERT INTO stats_daily (day, success)
+        SELECT date(downloaded_at), COUNT(*) FROM downloads
+        WHERE status = 'success' GROUP BY date(downloaded_at)
+    """)
+    conn.execute("""
+        INSERT INTO stats_artists (artist, success)
+        SELECT artist, COUNT(*) FROM downloads
+        WHERE status = 'success' AND artist != '' GROUP BY artist
     """)
-    conn.commit()
-    conn.close()
 
 
-def record_download(query: str, artist: str, title: str, status: str,
-                    attempts: int = 1, file_path: str = "", file_size: int = 0) -> None:
-    conn = get_connection()
-    existing = conn.execute(
-        "SELECT id FROM downloads WHERE query = ?", (query,)
-    ).fetchone()
+def init_db() -> None:
+    with _db(write=True, flush=True) as conn:
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS downloads (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                query TEXT NOT NULL,
+                artist TEXT DEFAULT '',
+                title TEXT DEFAULT '',
+                status TEXT NOT NULL,
+                attempts INTEGER DEFAULT 1,
+                file_path TEXT DEFAULT '',
+                file_size INTEGER DEFAULT 0,
+                duration REAL DEFAULT 0,
+                downloaded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                playlist_file TEXT,
+                total_tracks INTEGER DEFAULT 0,
+                success INTEGER DEFAULT 0,
+                failed INTEGER DEFAULT 0,
+                skipped INTEGER DEFAULT 0,
+                total_size INTEGER DEFAULT 0,
+                duration_seconds REAL DEFAULT 0,
+                started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE TABLE IF NOT EXISTS jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                query TEXT NOT NULL,
+                artist TEXT DEFAULT '',
+                title TEXT DEFAULT '',
+                state TEXT NOT NULL DEFAULT 'queued',
+                url TEXT DEFAULT '',
+                raw_path TEXT DEFAULT '',
+                error TEXT DEFAULT '',
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(session_id, position)
+            );
+
+            CREATE TABLE IF NOT EXISTS resolutions (
+                query_key TEXT PRIMARY KEY,
+                video_id TEXT NOT NULL,
+                url TEXT NOT NULL,
+                duration REAL DEFAULT 0,
+                channel TEXT DEFAULT '',
+                resolved_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE TABLE IF NOT EXISTS media (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                video_id TEXT DEFAULT '',
+                audio_hash TEXT DEFAULT '',
+                file_path TEXT NOT NULL UNIQUE,
+                artist TEXT DEFAULT '',
+                title TEXT DEFAULT '',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE TABLE IF NOT EXISTS library (
+                file_path TEXT PRIMARY KEY,
+                size INTEGER DEFAULT 0,
+                mtime REAL DEFAULT 0,
+                artist TEXT DEFAULT '',
+                title TEXT DEFAULT ''
+            );
+
+            CREATE TABLE IF NOT EXISTS playlist_lines (
+                playlist_file TEXT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                PRIMARY KEY (playlist_file, fingerprint)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS timings (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id INTEGER NOT NULL,
+                query TEXT NOT NULL,
+                search REAL,
+                throttle REAL,
+                queue_wait REAL,
+                ttfb REAL,
+                download REAL,
+                bytes_per_sec REAL,
+                transcode REAL,
+                tag REAL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            );
+
+            CREATE INDEX IF NOT EXISTS idx_media_video ON media(video_id);
+            CREATE INDEX IF NOT EXISTS idx_media_hash ON media(audio_hash);
+            CREATE INDEX IF NOT EXISTS idx_downloads_status ON downloads(status);
+            CREATE INDEX IF NOT EXISTS idx_downloads_date ON downloads(downloaded_at);
+            CREATE INDEX IF NOT EXISTS idx_downloads_artist ON downloads(artist);
+            CREATE INDEX IF NOT EXISTS idx_jobs_state ON jobs(session_id, state);
+            CREATE INDEX IF NOT EXISTS idx_timings_session ON timings(session_id);
+        """)
+        _add_column(conn, "sessions", "status", "TEXT DEFAULT 'done'")
+        _add_column(conn, "sessions", "file_size", "INTEGER")
+        _add_column(conn, "sessions", "file_mtime", "REAL")
+        _add_column(conn, "sessions", "synced", "INTEGER DEFAULT 0")
+        if not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_downloads_query'"
+        ).fetchone():
+            # Старые базы могли накопить дубли запросов — оставляем последнюю запись
+            conn.execute(
+                "DELETE FROM downloads WHERE id NOT IN (SELECT MAX(id) FROM downloads GROUP BY query)"
+            )
+            conn.execute("CREATE UNIQUE INDEX idx_downloads_query ON downloads(query)")
+        fresh = not conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'stats_totals'"
+        ).fetchone()
+        conn.executescript(_ROLLUPS)
+        if fresh:
+            _build_rollups(conn)
 
-    if existing:
+
+def _add_column(conn: sqlite3.Connection, table: str, column: str, decl: str) -> None:
+    cols = {r["name"] for r in conn.execute(f"PRAGMA table_info({table})")}
+    if column not in cols:
+        conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+
+def save_media(file_path: str, video_id: str = "", audio_hash: str = "",
+               artist: str = "", title: str = "") -> None:
+    with _db(write=True) as conn:
         conn.execute("""
-            UPDATE downloads SET status=?, attempts=?, file_path=?, file_size=?,
-                   downloaded_at=CURRENT_TIMESTAMP
-            WHERE query=?
-        """, (status, attempts, file_path, file_size, query))
-    else:
+            INSERT INTO media (video_id, audio_hash, file_path, artist, title)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(file_path) DO UPDATE SET
+                video_id=excluded.video_id, audio_hash=excluded.audio_hash,
+                artist=excluded.artist, title=excluded.title, created_at=CURRENT_TIMESTAMP
+        """, (video_id, audio_hash, file_path, artist, title))
+
+
+def find_media(video_id: str = "", audio_hash: str = "") -> list[dict]:
+    column, value = ("video_id", video_id) if video_id else ("audio_hash", audio_hash)
+    if not value:
+        return []
+    with _db() as conn:
+        rows = conn.execute(
+            f"SELECT file_path, artist, title FROM media WHERE {column} = ? ORDER BY id DESC", (value,)
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def get_library_tags() -> dict[str, tuple]:
+    with _db() as conn:
+        rows = conn.execute("SELECT file_path, size, mtime, artist, title FROM library").fetchall()
+    return {r["file_path"]: (r["size"], r["mtime"], r["artist"], r["title"]) for r in rows}
+
+
+def save_library_tags(rows: list[tuple], gone: list[str] = ()) -> None:
+    with _db(write=True) as conn:
+        conn.executemany("""
+            INSERT INTO library (file_path, size, mtime, artist, title) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(file_path) DO UPDATE SET
+                size=excluded.size, mtime=excluded.mtime, artist=excluded.artist, title=excluded.title
+        """, rows)
+        conn.executemany("DELETE FROM library WHERE file_path = ?", [(p,) for p in gone])
+
+
+def record_download(query: str, artist: str, title: str, status: str,
+                    attempts: int = 1, file_path: str = "", file_size: int = 0) -> None:
+    with _db(write=True) as conn:
         conn.execute("""
             INSERT INTO downloads (query, artist, title, status, attempts, file_path, file_size)
             VALUES (?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(query) DO UPDATE SET
+                status=excluded.status, attempts=excluded.attempts, file_path=excluded.file_path,
+                file_size=excluded.file_size, downloaded_at=CURRENT_TIMESTAMP
         """, (query, artist, title, status, attempts, file_path, file_size))
 
-    conn.commit()
-    conn.close()
 
+# --- тайминги по этапам ---
+
+TIMING_COLUMNS = (
+    "search", "throttle", "queue_wait", "ttfb", "download", "bytes_per_sec", "transcode", "tag",
+)
+_TIMING_LIST = ", ".join(TIMING_COLUMNS)
+
+
+def record_timings(session_id: int, query: str, timings: dict) -> None:
+    with _db(write=True) as conn:
+        conn.execute(f"""
+            INSERT INTO timings (session_id, query, {_TIMING_LIST})
+            VALUES (?, ?{", ?" * len(TIMING_COLUMNS)})
+        """, (session_id, query, *(timings.get(c) for c in TIMING_COLUMNS)))
+
+
+def get_timing_percentiles(limit: int = 5000) -> dict:
+    # Перцентили по последним limit трекам — экран статистики не зависит от размера истории
+    with _db() as conn:
+        rows = conn.execute(
+            f"SELECT {_TIMING_LIST} FROM timings ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()
+    stages = {}
+    for col in TIMING_COLUMNS:
+        values = sorted(r[col] for r in rows if r[col] is not None)
+        if values:
+            stages[col] = tuple(values[max(0, math.ceil(p / 100 * len(values)) - 1)] for p in (50, 95, 99))
+    return {"count": len(rows), "stages": stages}
+
+
+def get_resolution(query_key: str, ttl_days: int) -> dict | None:
+    with _db() as conn:
+        row = conn.execute("""
+            SELECT video_id, url, duration, channel FROM resolutions
+            WHERE query_key = ? AND resolved_at >= datetime('now', ?)
+        """, (query_key, f"-{ttl_days} days")).fetchone()
+    return dict(row) if row else None
+
+
+def save_resolution(query_key: str, video_id: str, url: str,
+                    duration: float = 0, channel: str = "") -> None:
+    with _db(write=True) as conn:
+        conn.execute("""
+            INSERT INTO resolutions (query_key, video_id, url, duration, channel)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(query_key) DO UPDATE SET
+                video_id=excluded.video_id, url=excluded.url, duration=excluded.duration,
+                channel=excluded.channel, resolved_at=CURRENT_TIMESTAMP
+        """, (query_key, video_id, url, duration or 0, channel or ""))
+
+
+def forget_resolution(query_key: str) -> None:
+    with _db(write=True) as conn:
+        conn.execute("DELETE FROM resolutions WHERE query_key = ?", (query_key,))
+
+
+def start_session(playlist_file: str, total: int) -> int:
+    with _db(write=True, flush=True) as conn:
+        cur = conn.execute("""
+            INSERT INTO sessions (playlist_file, total_tracks, status) VALUES (?, ?, 'running')
+        """, (playlist_file, total))
+        session_id = cur.lastrowid
+    return session_id
+
+
+def finish_session(session_id: int, success: int, failed: int, skipped: int,
+                   total_size: int, duration_seconds: float, status: str = "done") -> None:
+    # При докачке счётчики прибавляются к уже сохранённым
+    with _db(write=True, flush=True) as conn:
+        conn.execute("""
+            UPDATE sessions SET success = success + ?, failed = failed + ?, skipped = skipped + ?,
+                   total_size = total_size + ?, duration_seconds = duration_seconds + ?, status = ?
+            WHERE id = ?
+        """, (success, failed, skipped, total_size, duration_seconds, status, session_id))
+
+
+# --- журнал задач ---
+
+JOB_FINAL = ("done", "failed", "skipped")
+
+
+def add_job(session_id: int, position: int, query: str, artist: str, title: str) -> int:
+    with _db(write=True) as conn:
+        conn.execute("""
+            INSERT OR IGNORE INTO jobs (session_id, position, query, artist, title)
+            VALUES (?, ?, ?, ?, ?)
+        """, (session_id, position, query, artist, title))
+        job_id = conn.execute(
+            "SELECT id FROM jobs WHERE session_id = ? AND position = ?", (session_id, position)
+        ).fetchone()["id"]
+    return job_id
 
-def record_session(playlist_file: str, total: int, success: int,
-                   failed: int, skipped: int, total_size: int,
-                   duration_seconds: float) -> None:
-    conn = get_connection()
-    conn.execute("""
-        INSERT INTO sessions (playlist_file, total_tracks, success, failed,
-                              skipped, total_size, duration_seconds)
-        VALUES (?, ?, ?, ?, ?, ?, ?)
-    """, (playlist_file, total, success, failed, skipped, total_size, duration_seconds))
-    conn.commit()
-    conn.close()
+
+def update_job(job_id: int, state: str, url: str | None = None,
+               raw_path: str | None = None, error: str | None = None) -> None:
+    with _db(write=True) as conn:
+        conn.execute("""
+            UPDATE jobs SET state = ?, url = COALESCE(?, url), raw_path = COALESCE(?, raw_path),
+                   error = COALESCE(?, error), updated_at = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (state, url, raw_path, error, job_id))
+
+
+def get_resumable_session() -> dict | None:
+    with _db() as conn:
+        row = conn.execute(f"""
+            SELECT s.id, s.playlist_file, s.total_tracks, s.started_at,
+                   (SELECT COUNT(*) FROM jobs j WHERE j.session_id = s.id
+                    AND j.state NOT IN ({",".join("?" * len(JOB_FINAL))})) AS unfinished,
+                   (SELECT COALESCE(MAX(position), -1) FROM jobs j WHERE j.session_id = s.id) AS last_position
+            FROM sessions s
+            WHERE s.status IN ('running', 'interrupted')
+            ORDER BY s.id DESC LIMIT 1
+        """, JOB_FINAL).fetchone()
+    if not row:
+        return None
+    return dict(row)
+
+
+def get_unfinished_jobs(session_id: int) -> list[dict]:
+    with _db() as conn:
+        rows = conn.execute(f"""
+            SELECT id, position, query, artist, title, url, raw_path FROM jobs
+            WHERE session_id = ? AND state NOT IN ({",".join("?" * len(JOB_FINAL))})
+            ORDER BY position
+        """, (session_id, *JOB_FINAL)).fetchall()
+    return [
+        {"job_id": r["id"], "position": r["position"], "query": r["query"], "artist": r["artist"],
+         "title": r["title"], "url": r["url"], "raw_path": r["raw_path"]}
+        for r in rows
+    ]
+
+
+def get_settled_queries(session_id: int) -> list[str]:
+    with _db() as conn:
+        rows = conn.execute(
+            "SELECT query FROM jobs WHERE session_id = ? AND state IN ('done', 'skipped')", (session_id,)
+        ).fetchall()
+    return [r["query"] for r in rows]
+
+
+# --- инкрементальная синхронизация плейлистов ---
+
+def get_last_sync(playlist_file: str) -> dict | None:
+    with _db() as conn:
+        row = conn.execute("""
+            SELECT id, file_size, file_mtime, synced FROM sessions
+            WHERE playlist_file = ? AND file_size IS NOT NULL
+            ORDER BY id DESC LIMIT 1
+        """, (playlist_file,)).fetchone()
+    return dict(row) if row else None
+
+
+def get_line_fingerprints(playlist_file: str) -> set[str]:
+    with _db() as conn:
+        rows = conn.execute(
+            "SELECT fingerprint FROM playlist_lines WHERE playlist_file = ?", (playlist_file,)
+        ).fetchall()
+    return {r["fingerprint"] for r in rows}
+
+
+def add_line_fingerprints(playlist_file: str, fingerprints) -> None:
+    with _db(write=True) as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO playlist_lines (playlist_file, fingerprint) VALUES (?, ?)",
+            [(playlist_file, fp) for fp in fingerprints],
+        )
+
+
+def save_sync(session_id: int, playlist_file: str, file_size: int, file_mtime: float, synced: bool,
+              added: list[str], removed: list[str]) -> None:
+    with _db(write=True, flush=True) as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO playlist_lines (playlist_file, fingerprint) VALUES (?, ?)",
+            [(playlist_file, fp) for fp in added],
+        )
+        conn.executemany(
+            "DELETE FROM playlist_lines WHERE playlist_file = ? AND fingerprint = ?",
+            [(playlist_file, fp) for fp in removed],
+        )
+        conn.execute(
+            "UPDATE sessions SET file_size = ?, file_mtime = ?, synced = ? WHERE id = ?",
+            (file_size, file_mtime, int(synced), session_id),
+        )
+
+
+def close_session(session_id: int) -> None:
+    with _db(write=True, flush=True) as conn:
+        conn.execute("UPDATE sessions SET status = 'done' WHERE id = ?", (session_id,))
 
 
 def get_stats() -> dict:
-    conn = get_connection()
-
-    total = conn.execute("SELECT COUNT(*) as c FROM downloads").fetchone()["c"]
-    success = conn.execute(
-        "SELECT COUNT(*) as c FROM downloads WHERE status='success'"
-    ).fetchone()["c"]
-    failed = conn.execute(
-        "SELECT COUNT(*) as c FROM downloads WHERE status='failed'"
-    ).fetchone()["c"]
-    total_size = conn.execute(
-        "SELECT COALESCE(SUM(file_size), 0) as s FROM downloads WHERE status='success'"
-    ).fetchone()["s"]
-
-    total_time = conn.execute(
-        "SELECT COALESCE(SUM(duration_seconds), 0) as t FROM sessions"
-    ).fetchone()["t"]
+    now = datetime.now()
+    days = [now - timedelta(days=i) for i in range(6, -1, -1)]
+    with _db() as conn:
+        row = conn.execute("""
+            SELECT t.total, t.success, t.failed, t.total_size,
+                   (SELECT COALESCE(SUM(duration_seconds), 0) FROM sessions) AS total_time
+            FROM stats_totals t WHERE t.id = 1
+        """).fetchone()
+        per_day = dict(conn.execute(
+            "SELECT day, success FROM stats_daily WHERE day >= ?", (days[0].strftime("%Y-%m-%d"),)
+        ).fetchall())
+        top_artists = conn.execute("""
+            SELECT artist, success FROM stats_artists
+            WHERE success > 0 ORDER BY success DESC LIMIT 10
+        """).fetchall()
 
     # По дням (последние 7)
     daily = []
-    for i in range(6, -1, -1):
-        date = (datetime.now() - timedelta(days=i)).strftime("%Y-%m-%d")
-        count = conn.execute(
-            "SELECT COUNT(*) as c FROM downloads WHERE date(downloaded_at) = ? AND status='success'",
-            (date,)
-        ).fetchone()["c"]
-        day_name = (datetime.now() - timedelta(days=i)).strftime("%a")
-        daily.append({"day": day_name, "date": date, "count": count})
-
-    # Топ артисты
-    top_artists = conn.execute("""
-        SELECT artist, COUNT(*) as c FROM downloads
-        WHERE status='success' AND artist != ''
-        GROUP BY artist ORDER BY c DESC LIMIT 10
-    """).fetchall()
-
-    conn.close()
+    for day in days:
+        date = day.strftime("%Y-%m-%d")
+        daily.append({"day": day.strftime("%a"), "date": date, "count": per_day.get(date, 0)})
 
     return {
-        "total": total,
-        "success": success,
-        "failed": failed,
-        "total_size": total_size,
-        "total_time": total_time,
+        "total": row["total"] if row else 0,
+        "success": row["success"] if row else 0,
+        "failed": row["failed"] if row else 0,
+        "total_size": row["total_size"] if row else 0,
+        "total_time": row["total_time"] if row else 0,
         "daily": daily,
-        "top_artists": [{"artist": r["artist"], "count": r["c"]} for r in top_artists],
+        "top_artists": [{"artist": r["artist"], "count": r["success"]} for r in top_artists],
+        "timings": get_timing_percentiles(),
     }
 
 
 def get_failed_count() -> int:
-    conn = get_connection()
-    count = conn.execute(
-        "SELECT COUNT(*) as c FROM downloads WHERE status='failed'"
-    ).fetchone()["c"]
-    conn.close()
+    with _db() as conn:
+        count = conn.execute(
+            "SELECT COUNT(*) as c FROM downloads WHERE status='failed'"
+        ).fetchone()["c"]
     return count
 
 
 def get_failed_tracks() -> list[dict]:
-    conn = get_connection()
-    rows = conn.execute(
-        "SELECT query, artist, title FROM downloads WHERE status='failed'"
-    ).fetchall()
-    conn.close()
+    with _db() as conn:
+        rows = conn.execute(
+            "SELECT query, artist, title FROM downloads WHERE status='failed'"
+        ).fetchall()
     return [{"query": r["query"], "artist": r["artist"], "title": r["title"]} for r in rows]
\ No newline at end of file
@@ -1,5 +1,10 @@
 import os
-from rich.console import Console
+from threading import Event, Thread
+from rich.console import Console, Group
+from rich.live import Live
+from rich.progress import (
+    Progress, SpinnerColumn, BarColumn, TextColumn, TimeRemainingColumn, MofNCompleteColumn,
+)
 from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
@@ -46,26 +51,132 @@ def show_first_run(theme: Theme):
     console.input(f"[{theme.muted}]{t('press_enter')}[/]")
 
 
-def show_playlist_info(theme: Theme, filepath, total, new):
+def show_playlist_info(theme: Theme, filepath, total, new, changed=None, removed=0):
     content = (
         f"[{theme.muted}]{t('playlist_file')}   [{theme.primary}]{filepath}[/]\n"
         f"[{theme.muted}]{t('playlist_tracks')} [{theme.primary}]{total}[/]\n"
         f"[{theme.muted}]{t('playlist_new')}  [{theme.success}]{new}[/] "
         f"[{theme.muted}]({total - new} {t('playlist_existing')})[/]"
     )
+    if changed is not None:
+        content += f"\n[{theme.muted}]{t('playlist_changed')} [{theme.info}]{changed}[/]"
+    if removed:
+        content += f"\n[{theme.muted}]{t('playlist_removed')} [{theme.warning}]{removed}[/]"
     console.print(Panel(content, title=t("panel_playlist"), border_style=theme.border))
     console.print()
 
 
-def show_download_result(theme: Theme, success, failed, skipped, retried, total, elapsed, total_size):
+def render_status(theme: Theme, snap: dict) -> Panel:
+    text = (
+        f"[{theme.success}]✅ {snap['success']}[/]  "
+        f"[{theme.error}]❌ {snap['failed']}[/]  "
+        f"[{theme.warning}]🔄 {snap['retried']}[/]  "
+        f"[{theme.muted}]⏭ {snap['skipped']}[/]  "
+        + (f"[{theme.muted}]🔗 {snap['deduped']}[/]  " if snap["deduped"] else "")
+        + f"[{theme.info}]💾 {format_size(snap['total_size'])}[/]  "
+        f"[{theme.muted}]⏱ {int(snap['elapsed'])}s[/]"
+    )
+    load = "  ".join(
+        f"{t('stage_' + name)} [{theme.info}]{util:.0%}[/] ⏳{queued}"
+        for name, util, queued in snap["stages"]
+    ) + f"  ⇄ {snap['in_flight']}/{snap['window']}"
+    text += f"\n[{theme.muted}]{load}[/]"
+    if snap["auto"]:
+        limit, decision = snap["auto"]
+        text += f"\n[{theme.muted}]{t('dl_auto')}: [{theme.warning}]⚡ {limit}[/]"
+        if decision:
+            text += f"  ({decision})"
+    if snap["last_done"]:
+        text += f"\n[{theme.muted}]{t('dl_last')}: [{theme.success}]✅ {snap['last_done'][:50]}[/]"
+    return Panel(text, title=f"[{theme.title}]{t('dl_progress_title')}[/]", border_style=theme.border)
+
+
+class LiveProgress:
+    def __init__(self, theme: Theme, snapshot, total: int | None, fps: float = 4):
+        self.theme = theme
+        self.snapshot = snapshot
+        self.progress = Progress(
+            SpinnerColumn(),
+            TextColumn("[bold]{task.description}"),
+            BarColumn(complete_style=theme.bar_complete, finished_style=theme.success),
+            MofNCompleteColumn(),
+            TimeRemainingColumn(),
+            console=console,
+        )
+        self.task_id = self.progress.add_task(t("dl_progress"), total=total)
+        # Live сам вызывает _render fps раз в секунду — сколько бы треков ни завершилось между кадрами
+        self.live = Live(get_renderable=self._render, console=console, refresh_per_second=fps)
+
+    def _render(self):
+        snap = self.snapshot()
+        self.progress.update(self.task_id, completed=snap["done"])
+        return Group(render_status(self.theme, snap), self.progress)
+
+    def __enter__(self):
+        self.live.start(refresh=True)
+        return self
+
+    def __exit__(self, *exc):
+        self.live.stop()
+
+
+# Одна строка раз в interval секунд: для перенаправленного вывода и огромных плейлистов
+class PlainProgress:
+    def __init__(self, snapshot, total: int | None, interval: float = 2.0):
+        self.snapshot = snapshot
+        self.total = total
+        self.interval = interval
+        self._stop = Event()
+        self._thread = Thread(target=self._run, name="progress", daemon=True)
+
+    def _line(self) -> str:
+        s = self.snapshot()
+        rate = s["done"] / s["elapsed"] * 60 if s["elapsed"] > 0 else 0.0
+        return (
+            f"[{s['done']}/{self.total if self.total is not None else '?'}] "
+            f"ok {s['success']}  failed {s['failed']}  skipped {s['skipped']}  "
+            f"{format_size(s['total_size'])}  {rate:.1f}/min  {format_time(s['elapsed'])}"
+        )
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            print(self._line(), flush=True)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        print(self._line(), flush=True)
+
+
+def progress_view(theme: Theme, snapshot, total: int | None, mode: str = "auto"):
+    if mode == "plain" or (mode == "auto" and not console.is_terminal):
+        return PlainProgress(snapshot, total)
+    return LiveProgress(theme, snapshot, total)
+
+
+def show_download_result(theme: Theme, success, failed, skipped, retried, total, elapsed, total_size,
+                         stages=None, deduped=0):
     content = (
         f"[{theme.success}]{t('result_ok')}     {success}[/] / {total}\n"
         f"[{theme.error}]{t('result_fail')}  {failed}[/]\n"
         f"[{theme.warning}]{t('result_retry')}  {retried}[/]\n"
         f"[{theme.muted}]{t('result_skip')}  {skipped}[/]\n"
-        f"[{theme.info}]{t('result_time')}       {format_time(elapsed)}[/]\n"
+        + (f"[{theme.muted}]{t('result_dedup')}  {deduped}[/]\n" if deduped else "")
+        + f"[{theme.info}]{t('result_time')}       {format_time(elapsed)}[/]\n"
         f"[{theme.info}]{t('result_size')}      {format_size(total_size)}[/]"
     )
+    if stages:
+        content += f"\n\n[{theme.subtitle}]{t('result_stages')}[/]"
+        for name, st in stages.items():
+            content += (
+                f"\n[{theme.muted}]  {t('stage_' + name):<14}[/]"
+                f"[{theme.primary}]{st['utilisation']:>5.0%}[/] "
+                f"[{theme.muted}]× {st['workers']}[/]"
+            )
     console.print(Panel(content, title=t("panel_result"), border_style=theme.border))
 
 
@@ -97,7 +208,21 @@ def show_stats(theme: Theme, stats: dict):
                 f"— {a['count']} {t('stats_tracks')}\n"
             )
 
-    console.print(Panel(main + chart + artists, title=t("stats_title"), border_style=theme.border))
+    timings = ""
+    stages = stats.get("timings", {}).get("stages")
+    if stages:
+        timings = f"\n[{theme.subtitle}]{t('stats_timings', n=stats['timings']['count'])}[/]\n"
+        for name, values in stages.items():
+            if name == "bytes_per_sec":
+                cells = [f"{format_size(int(v))}/s" for v in values]
+            else:
+                cells = [f"{v * 1000:.0f} ms" if v < 1 else f"{v:.1f} s" for v in values]
+            timings += (
+                f"[{theme.muted}]  {t('timing_' + name):<14}[/]"
+                f"[{theme.primary}]{cells[0]:>10}[/] {cells[1]:>10} {cells[2]:>10}\n"
+            )
+
+    console.print(Panel(main + chart + artists + timings, title=t("stats_title"), border_style=theme.border))
 
 
 def show_failed_tracks(theme: Theme, tracks: list[str], max_show=15):
@@ -136,14 +261,28 @@ def show_config(theme: Theme, config):
 
     d = config.download
     rows = [
-        ("Threads", str(d.threads)),
-        ("Pause", f"{d.pause} s"),
+        ("Threads", f"auto ({d.threads_min}–{d.threads_max})" if d.threads_auto else str(d.threads)),
+        ("Resolve threads", str(d.resolve_threads)),
+        ("Transcode threads", str(d.transcode_threads) if d.transcode_threads else f"auto ({os.cpu_count()})"),
+        ("Tag threads", str(d.tag_threads)),
+        ("Queue size", str(d.queue_size)),
+        ("Rate limit", f"{d.rate_limit}/s, burst {d.rate_burst}" if d.rate_limit else "❌"),
         ("Retries", str(d.retry_attempts)),
         ("Retry delay", f"{d.retry_delay} s"),
+        ("Format", "MP3" if d.codec == "mp3" else "Native (Opus/AAC)"),
         ("Quality", f"{d.quality} kbps"),
         ("Max duration", f"{d.max_duration} s"),
         ("Timeout", f"{d.timeout} s"),
         ("Smart Search", "✅" if d.smart_search else "❌"),
+        ("Candidates", str(d.search_candidates)),
+        ("Match threshold", str(d.match_threshold)),
+        ("Dedup", "✅" if d.dedup else "❌"),
+        ("Incremental sync", "✅" if d.incremental_sync else "❌"),
+        ("Progress", d.progress),
+        ("Watch", f"{config.paths.watch_dir}, {d.watch_interval} s"),
+        ("Profile", config.paths.profile_dir if d.profile else "❌"),
+        ("Metrics", f"127.0.0.1:{d.metrics_port}/metrics" if d.metrics_port else "❌"),
+        ("Search cache", f"{d.cache_ttl_days} d" if d.cache_ttl_days else "❌"),
         ("Covers", "✅" if config.metadata.download_covers else "❌"),
         ("Theme", theme.label),
         ("Language", config.language.upper()),
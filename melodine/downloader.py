@@ -1,29 +1,69 @@
 import os
 import time
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from threading import Lock, Event
-
-import yt_dlp
-from rich.progress import (
-    Progress, SpinnerColumn, BarColumn, TextColumn,
-    TimeRemainingColumn, MofNCompleteColumn,
-)
-from rich.live import Live
-from rich.panel import Panel
-from rich.console import Group
+from collections import Counter
+from contextlib import nullcontext
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock, Event, local
+from typing import Iterable
 
 from melodine.config import AppConfig
 from melodine.themes import Theme
-from melodine.tagger import add_tags
-from melodine.search import generate_search_queries
-from melodine.database import record_download
-from melodine.utils import sanitize_filename, format_size
-from melodine.locales import t
-from melodine.display import console
+from melodine.tagger import write_metadata
+from melodine.transcoder import transcode, remux, native_ext
+from melodine.pipeline import Pipeline, Stage, Retry
+from melodine.ratelimit import TokenBucket
+from melodine.ytdl import YDLPool, yt_dlp
+from melodine.concurrency import AIMDController
+from melodine.search import generate_search_queries, entry_to_result, pick_best
+from melodine.database import (
+    record_download, get_resolution, save_resolution, forget_resolution, add_job, update_job,
+    save_media, find_media, record_timings,
+)
+from melodine.utils import sanitize_filename, normalize_query, file_hash, link_or_copy
+from melodine.library import LibraryIndex
+
+PARTS_DIR = ".parts"
+
+_THROTTLE_MARKERS = ("429", "too many requests", "rate-limit", "rate limit", "not a bot")
+
+# Класс ошибки по тексту — первое совпадение сверху вниз
+_ERROR_MARKERS = (
+    ("throttled", _THROTTLE_MARKERS),
+    ("not_found", ("not found", "no video formats", "unable to extract")),
+    ("unavailable", ("unavailable", "private video", "removed", "copyright", "blocked",
+                     "confirm your age", "members-only")),
+    ("network", ("timed out", "timeout", "connection", "network", "resolve host", "ssl", "http error 5")),
+    ("ffmpeg", ("ffmpeg", "invalid data", "postprocess")),
+)
+
+
+_FINAL_STATE = {"success": "done", "skipped": "skipped", "failed": "failed"}
+
+
+def _add_time(res, key: str, seconds: float):
+    res.timings[key] = res.timings.get(key, 0.0) + seconds
+
+
+def _is_throttled(error: str) -> bool:
+    low = error.lower()
+    return any(m in low for m in _THROTTLE_MARKERS)
+
+
+def error_class(error: str) -> str:
+    low = error.lower()
+    for name, markers in _ERROR_MARKERS:
+        if any(m in low for m in markers):
+            return name
+    return "other"
 
 
 class DownloadResult:
-    __slots__ = ("query", "artist", "title", "status", "attempts", "file_path", "file_size", "error")
+    __slots__ = (
+        "query", "artist", "title", "status", "attempts", "file_path", "file_size", "error",
+        "base", "out_path", "acodec", "url", "raw_path", "cached", "checked", "queries", "tries",
+        "job_id", "state", "video_id", "dup_of", "audio_hash", "timings", "t_mark", "tagged",
+        "gated_at",
+    )
 
     def __init__(self, query, artist, title):
         self.query = query
@@ -34,12 +74,37 @@ class DownloadResult:
         self.file_path = ""
         self.file_size = 0
         self.error = ""
+        self.base = ""
+        self.out_path = ""
+        self.acodec = ""
+        self.url = ""
+        self.raw_path = ""
+        self.cached = False
+        self.checked = False
+        self.queries: list[str] = []
+        self.tries = 0
+        self.job_id = 0
+        self.state = "queued"
+        self.video_id = ""
+        self.dup_of = None
+        self.audio_hash = ""
+        self.tagged = False
+        # Секунды по этапам; t_mark — когда задача последний раз вышла из стадии
+        self.timings: dict[str, float] = {}
+        self.t_mark = time.monotonic()
+        # Когда задача зарезервировала токен лимитера и ушла его дожидаться
+        self.gated_at = 0.0
 
 
 class DownloadEngine:
-    def __init__(self, config: AppConfig, theme: Theme):
+    def __init__(self, config: AppConfig, theme: Theme, session_id: int = 0,
+                 library: LibraryIndex | None = None, reporter=None):
         self.config = config
         self.theme = theme
+        self.session_id = session_id
+        self.library = library
+        # reporter(res) вместо Rich Live — для запуска без интерфейса
+        self.reporter = reporter
         self._lock = Lock()
         self._stop = Event()
 
@@ -47,50 +112,72 @@ class DownloadEngine:
         self.failed_count = 0
         self.skipped_count = 0
         self.retry_count = 0
+        self.dedup_count = 0
         self.total_size = 0
         self.failed_list: list[str] = []
+        self.error_counts: Counter = Counter()
         self.last_done = ""
+        self._tuner: AIMDController | None = None
+        self._inflight: dict[str, DownloadResult] = {}
+        self._pipe: Pipeline | None = None
+        self._t0 = 0.0
+        self._local = local()
+        self.tracer = None
+        self.profile_paths: list[str] = []
+        self.metrics = None
 
-    def download_playlist(self, tracks: list[dict]) -> dict:
+    def download_playlist(self, tracks: Iterable[dict], total: int | None = None) -> dict:
+        if not self.config.download.profile:
+            return self._download(tracks, total)
+        from melodine.profiling import Profiler
+        with Profiler(self.config.paths.profile_dir) as prof:
+            self.tracer = prof.tracer
+            try:
+                result = self._download(tracks, total)
+            finally:
+                self.tracer = None
+        self.profile_paths = prof.paths
+        result["profile"] = prof.paths
+        return result
+
+    def _download(self, tracks: Iterable[dict], total: int | None) -> dict:
         output_dir = self.config.paths.output
         os.makedirs(output_dir, exist_ok=True)
+        if self.library is None:
+            self.library = LibraryIndex(output_dir).scan()
 
-        total = len(tracks)
-        t0 = time.time()
+        # Треки могут приходить генератором — очередь держит лишь окно задач
+        if total is None and hasattr(tracks, "__len__"):
+            total = len(tracks)
+        self._t0 = t0 = time.time()
 
-        progress = Progress(
-            SpinnerColumn(),
-            TextColumn("[bold]{task.description}"),
-            BarColumn(complete_style=self.theme.bar_complete, finished_style=self.theme.success),
-            MofNCompleteColumn(),
-            TimeRemainingColumn(),
-            console=console,
+        self._search_pool = YDLPool(self._search_opts())
+        self._variant_pool = ThreadPoolExecutor(
+            max_workers=self.config.download.resolve_threads * 4, thread_name_prefix="variant",
         )
-        task_id = progress.add_task(t("dl_progress"), total=total)
-
-        def status_panel():
-            elapsed = time.time() - t0
-            text = (
-                f"[{self.theme.success}]✅ {self.success_count}[/]  "
-                f"[{self.theme.error}]❌ {self.failed_count}[/]  "
-                f"[{self.theme.warning}]🔄 {self.retry_count}[/]  "
-                f"[{self.theme.muted}]⏭ {self.skipped_count}[/]  "
-                f"[{self.theme.info}]💾 {format_size(self.total_size)}[/]  "
-                f"[{self.theme.muted}]⏱ {int(elapsed)}s[/]"
-            )
-            if self.last_done:
-                text += f"\n[{self.theme.muted}]{t('dl_last')}: [{self.theme.success}]✅ {self.last_done[:50]}[/]"
-            return Panel(text, title=f"[{self.theme.title}]{t('dl_progress_title')}[/]", border_style=self.theme.border)
-
-        with Live(Group(status_panel(), progress), console=console, refresh_per_second=4) as live:
-            with ThreadPoolExecutor(max_workers=self.config.download.threads) as pool:
-                futures = {pool.submit(self._download_one, tr, output_dir): tr for tr in tracks}
-
-                for future in as_completed(futures):
+        self._fetch_pool = YDLPool(self._fetch_opts(output_dir))
+        try:
+            self._pipe = pipe = self._build_pipeline()
+            if self.config.download.metrics_port:
+                from melodine.metrics import MetricsServer
+                self.metrics = MetricsServer(self, self.config.download.metrics_port)
+                if not self.metrics.start():
+                    self.metrics = None
+            jobs = (self._make_job(tr, output_dir, i) for i, tr in enumerate(tracks))
+
+            # Интерфейс сам опрашивает snapshot() с фиксированной частотой,
+            # поэтому цикл результатов ничего не рисует
+            view = nullcontext()
+            if self.reporter is None:
+                from melodine.display import progress_view
+                view = progress_view(self.theme, self.snapshot, total, self.config.download.progress)
+            with view:
+                pipe.start(jobs)
+
+                for res in pipe:
                     if self._stop.is_set():
                         break
 
-                    res: DownloadResult = future.result()
                     with self._lock:
                         if res.status == "success":
                             self.success_count += 1
@@ -98,94 +185,463 @@ class DownloadEngine:
                             self.last_done = res.query
                             if res.attempts > 1:
                                 self.retry_count += 1
+                            if res.dup_of:
+                                self.dedup_count += 1
                         elif res.status == "skipped":
                             self.skipped_count += 1
                         else:
                             self.failed_count += 1
                             self.failed_list.append(res.query)
+                            self.error_counts[error_class(res.error)] += 1
 
-                    progress.update(task_id, advance=1)
-                    live.update(Group(status_panel(), progress))
+                    if self.reporter:
+                        self.reporter(res)
 
                     record_download(
                         query=res.query, artist=res.artist, title=res.title,
                         status=res.status, attempts=res.attempts,
                         file_path=res.file_path, file_size=res.file_size,
                     )
+                    if res.timings and res.status != "skipped":
+                        record_timings(self.session_id, res.query, res.timings)
+                        if self.metrics:
+                            self.metrics.observe(res.timings)
+                    self._mark(res, _FINAL_STATE.get(res.status, "failed"), error=res.error)
+                    if res.video_id and self._inflight.get(res.video_id) is res:
+                        with self._lock:
+                            del self._inflight[res.video_id]
 
+                pipe.join()
+        except BaseException:
+            # Пайплайн не должен пережить сбой цикла результатов: без этого
+            # его потоки продолжат работу на уже закрытых пулах
+            self._stop.set()
+            raise
+        finally:
+            if self.metrics:
+                self.metrics.stop()
+                self.metrics = None
+            self._variant_pool.shutdown(wait=False, cancel_futures=True)
+            self._search_pool.close()
+            self._fetch_pool.close()
+
+        elapsed = time.time() - t0
         return {
             "success": self.success_count, "failed": self.failed_count,
             "skipped": self.skipped_count, "retried": self.retry_count,
-            "total": total, "elapsed": time.time() - t0,
-            "total_size": self.total_size, "failed_list": self.failed_list,
+            "deduped": self.dedup_count, "elapsed": elapsed,
+            "total": total if total is not None else self.success_count + self.failed_count + self.skipped_count,
+            "total_size": self.total_size, "failed_list": self.failed_list, "stopped": self.stopped,
+            "errors": dict(self.error_counts),
+            "stages": {
+                st.name: {"workers": st.workers, "done": st.done, "utilisation": st.utilisation(elapsed)}
+                for st in pipe.stages
+            },
         }
 
-    def _download_one(self, track: dict, output_dir: str) -> DownloadResult:
+    def snapshot(self) -> dict:
+        elapsed = time.time() - self._t0
+        pipe = self._pipe
+        return {
+            "success": self.success_count, "failed": self.failed_count,
+            "skipped": self.skipped_count, "retried": self.retry_count, "deduped": self.dedup_count,
+            "done": self.success_count + self.failed_count + self.skipped_count,
+            "total_size": self.total_size, "elapsed": elapsed, "last_done": self.last_done,
+            "errors": dict(self.error_counts),
+            "stages": [(st.name, st.utilisation(elapsed), st.inbox.qsize()) for st in pipe.stages],
+            "in_flight": pipe.in_flight, "window": pipe.window,
+            "auto": (self._tuner.limit, self._tuner.last_decision) if self._tuner else None,
+        }
+
+    @property
+    def stages(self) -> list[Stage]:
+        return self._pipe.stages if self._pipe else []
+
+    def stop(self):
+        self._stop.set()
+
+    @property
+    def stopped(self) -> bool:
+        return self._stop.is_set()
+
+    # --- pipeline ---
+
+    def _build_pipeline(self) -> Pipeline:
+        cfg = self.config.download
+        size = cfg.queue_size
+        if cfg.threads_auto:
+            fetch = Stage("fetch", self._timed("download", self._fetch), cfg.threads_max, size,
+                          limit=cfg.threads, throttle=self._fetch_gate)
+            self._tuner = AIMDController(fetch.set_limit, cfg.threads, cfg.threads_min, cfg.threads_max)
+        else:
+            fetch = Stage("fetch", self._timed("download", self._fetch), cfg.threads, size,
+                          throttle=self._fetch_gate)
+            self._tuner = None
+        self._bucket = TokenBucket(cfg.rate_limit, cfg.rate_burst)
+        stages = [
+            Stage("resolve", self._timed("search", self._resolve), cfg.resolve_threads, size,
+                  throttle=self._search_gate),
+            fetch,
+            Stage("transcode", self._timed("transcode", self._transcode),
+                  cfg.transcode_threads or os.cpu_count() or 1, size),
+            Stage("tag", self._timed("tag", self._finalize), cfg.tag_threads, size),
+        ]
+        return Pipeline(stages, self._stop, on_error=self._on_error)
+
+    def _timed(self, name: str, fn):
+        # Время в стадии и ожидание перед ней (очередь, слот, отложенный повтор)
+        def run(res: DownloadResult) -> bool:
+            started = time.monotonic()
+            _add_time(res, "queue_wait", started - res.t_mark)
+            try:
+                return fn(res)
+            finally:
+                res.t_mark = time.monotonic()
+                _add_time(res, name, res.t_mark - started)
+                if self.tracer:
+                    self.tracer.span(name, started, res.t_mark, query=res.query, status=res.status)
+        return run
+
+    def _throttle(self, res: DownloadResult, tokens: int = 1):
+        # Токен резервируется сразу, а ждёт его задача в планировщике пайплайна:
+        # воркер стадии тем временем берёт задачи, которым токен не нужен
+        if res.gated_at:
+            started, res.gated_at = res.gated_at, 0.0
+            self._throttled(res, started)
+            return
+        wait = self._bucket.reserve(tokens)
+        if wait > 0:
+            res.gated_at = time.monotonic()
+            raise Retry(wait)
+
+    def _throttled(self, res: DownloadResult, started: float):
+        # Ожидание лимитера считается отдельно от очереди
+        now = time.monotonic()
+        _add_time(res, "throttle", now - started)
+        res.t_mark += now - started
+        if self.tracer:
+            self.tracer.span("throttle", started, now, query=res.query)
+
+    def _make_job(self, track: dict, output_dir: str, position: int) -> DownloadResult:
         artist = track["artist"]
         title = track["title"]
-        query = track["query"]
-        res = DownloadResult(query, artist, title)
-
+        res = DownloadResult(track["query"], artist, title)
         fname = f"{artist} - {title}" if artist else title
-        safe = sanitize_filename(fname)
-        mp3_path = os.path.join(output_dir, f"{safe}.mp3")
+        res.base = os.path.join(output_dir, sanitize_filename(fname))
+        res.out_path = f"{res.base}.mp3"
+
+        # При докачке задача уже есть в журнале вместе с найденным URL и исходником
+        res.url = track.get("url", "")
+        res.raw_path = track.get("raw_path", "")
+        res.job_id = track.get("job_id", 0)
+        if self.session_id and not res.job_id:
+            res.job_id = add_job(self.session_id, track.get("position", position), res.query, artist, title)
+        return res
+
+    def _mark(self, res: DownloadResult, state: str, **fields):
+        if not res.job_id or state == res.state:
+            return
+        res.state = state
+        try:
+            update_job(res.job_id, state, **fields)
+        except Exception:
+            pass
+
+    def _fetch_gate(self, res: DownloadResult):
+        if res.raw_path and os.path.exists(res.raw_path):
+            return
+        if res.video_id and self._inflight.get(res.video_id, res) is not res:
+            return
+        self._throttle(res)
+
+    def _prepare(self, res: DownloadResult):
+        if res.checked:
+            return
+        res.checked = True
 
-        if os.path.exists(mp3_path):
+        existing = self.library.find(res.artist, res.title)
+        if existing:
             res.status = "skipped"
-            res.file_path = mp3_path
-            return res
+            res.file_path = existing
+            return
+        if res.url:
+            return
+        if res.query.startswith(("http://", "https://")):
+            res.url = res.query
+            return
 
-        out_tpl = os.path.join(output_dir, f"{safe}.%(ext)s")
         cfg = self.config.download
+        if cfg.cache_ttl_days:
+            hit = get_resolution(normalize_query(res.query), cfg.cache_ttl_days)
+            if hit:
+                res.url = hit["url"]
+                res.video_id = hit["video_id"]
+                res.cached = True
+                return
 
-        queries = generate_search_queries(artist, title) if cfg.smart_search else [query]
+        res.queries = generate_search_queries(res.artist, res.title) if cfg.smart_search else [res.query]
 
-        ydl_opts = {
+    def _search_gate(self, res: DownloadResult):
+        # Кэш и пропуски проверяем до лимитера, чтобы не тратить на них токены;
+        # один токен на поиск трека, сколько бы вариантов запроса ни понадобилось
+        try:
+            self._prepare(res)
+        except Exception:
+            # Например, занятая база — _resolve повторит проверку и сообщит об ошибке сам
+            res.checked = False
+            return
+        if res.status == "pending" and not res.url:
+            self._throttle(res)
+
+    def _resolve(self, res: DownloadResult) -> bool:
+        self._prepare(res)
+        if res.status != "pending":
+            return False
+        if self._stop.is_set():
+            return self._abort(res)
+        if res.url:
+            return True
+
+        cfg = self.config.download
+        self._mark(res, "resolving")
+
+        # Сначала исходный запрос; остальные варианты ищутся параллельно и только
+        # если ни один кандидат не прошёл порог
+        found, errors = self._search_all(res.queries[:1])
+        primary = found[0] if found else []
+        best = pick_best(primary, res.artist, res.title, cfg.max_duration, cfg.match_threshold)
+        searched = 1
+        if not best and len(res.queries) > 1:
+            more, more_errors = self._search_all(res.queries[1:])
+            found += more
+            errors += more_errors
+            searched = len(res.queries)
+            candidates = {}
+            for cand in (c for batch in found for c in batch):
+                candidates.setdefault(cand["id"] or cand["url"], cand)
+            best = pick_best(list(candidates.values()), res.artist, res.title, cfg.max_duration, cfg.match_threshold)
+
+        if len(errors) == searched:
+            res.error = errors[-1]
+            res.tries += 1
+            if res.tries < max(1, cfg.retry_attempts):
+                raise Retry(cfg.retry_delay * res.tries)
+
+        if not best:
+            # Оценка не понимает транслитерацию и переводы («Кино» / «Kino»):
+            # тогда, как и раньше, берём первый подходящий по длине результат исходного запроса
+            best = next((
+                c for c in primary
+                if c.get("url") and (c.get("duration") or 0) < cfg.max_duration
+            ), None)
+        if not best:
+            res.status = "failed"
+            res.error = res.error or "not found"
+            return False
+
+        res.url = best["url"]
+        res.video_id = best["id"]
+        if cfg.cache_ttl_days and best["id"]:
+            try:
+                save_resolution(
+                    normalize_query(res.query), best["id"], best["url"],
+                    best["duration"], best["channel"],
+                )
+            except Exception:
+                pass
+        return True
+
+    def _search_all(self, queries: list[str]) -> tuple[list[list[dict]], list[str]]:
+        found, errors = [], []
+        futures = [self._variant_pool.submit(self._search_many, q) for q in queries]
+        for fut in futures:
+            try:
+                found.append(fut.result())
+            except Exception as e:
+                errors.append(str(e))
+        return found, errors
+
+    def _search_opts(self) -> dict:
+        cfg = self.config.download
+        return {
+            "quiet": True, "no_warnings": True, "noprogress": True,
+            "extract_flat": "in_playlist",
+            "socket_timeout": cfg.timeout,
+            "extractor_retries": 3,
+        }
+
+    def _fetch_opts(self, output_dir: str) -> dict:
+        cfg = self.config.download
+        return {
             "format": "bestaudio/best",
-            "postprocessors": [{"key": "FFmpegExtractAudio", "preferredcodec": "mp3", "preferredquality": str(cfg.quality)}],
-            "outtmpl": out_tpl,
+            "outtmpl": os.path.join(output_dir, PARTS_DIR, "%(id)s.%(ext)s"),
             "noplaylist": True,
             "quiet": True, "no_warnings": True, "noprogress": True,
-            "overwrites": True,
+            "overwrites": False, "continuedl": True,
             "socket_timeout": cfg.timeout,
             "retries": 3, "fragment_retries": 3, "extractor_retries": 3,
             "match_filter": yt_dlp.utils.match_filter_func(f"duration < {cfg.max_duration}"),
+            "progress_hooks": [self._on_progress],
         }
 
-        last_err = ""
-        for sq in queries:
+    def _on_progress(self, d: dict):
+        # Экземпляры YoutubeDL у каждого потока свои, текущая задача — в thread-local
+        res = getattr(self._local, "res", None)
+        if res is None:
+            return
+        if d.get("status") == "downloading" and "ttfb" not in res.timings and d.get("downloaded_bytes"):
+            res.timings["ttfb"] = time.monotonic() - self._local.started
+        elif d.get("status") == "finished" and d.get("elapsed"):
+            res.timings["bytes_per_sec"] = (d.get("downloaded_bytes") or 0) / d["elapsed"]
+
+    def _search_many(self, query: str) -> list[dict]:
+        n = self.config.download.search_candidates
+        info = self._search_pool.get().extract_info(f"ytsearch{n}:{query}", download=False)
+        return [entry_to_result(e) for e in (info or {}).get("entries") or [] if e]
+
+    def _fetch(self, res: DownloadResult) -> bool:
+        if self._stop.is_set():
+            return self._abort(res)
+
+        if res.raw_path and os.path.exists(res.raw_path):
+            return True
+
+        cfg = self.config.download
+        if cfg.dedup and res.video_id:
+            res.dup_of = self._find_copy(video_id=res.video_id)
+            if res.dup_of:
+                return True
+            # То же видео уже качает другой поток — ждём его вне слота стадии
+            with self._lock:
+                owner = self._inflight.setdefault(res.video_id, res)
+            if owner is not res:
+                raise Retry(1.0)
+
+        self._mark(res, "downloading", url=res.url)
+        # Исходник качается во временную папку, итоговое имя задаёт конвертация;
+        # .part после прерванного запуска докачивается, а не начинается заново
+        out_dir, name = os.path.split(res.base)
+        out_tpl = os.path.join(out_dir, PARTS_DIR, f"{name}.%(ext)s")
+
+        res.attempts += 1
+        started = time.monotonic()
+        path, err = "", ""
+        res.timings.pop("ttfb", None)
+        self._local.res, self._local.started = res, started
+        try:
+            info = self._fetch_pool.get(outtmpl=out_tpl).extract_info(res.url, download=True)
+            for d in (info or {}).get("requested_downloads") or []:
+                if d.get("filepath") and os.path.exists(d["filepath"]):
+                    path = d["filepath"]
+                    res.acodec = d.get("acodec") or info.get("acodec") or ""
+                    res.video_id = res.video_id or info.get("id", "")
+                    break
+        except Exception as e:
+            err = res.error = str(e)
+        finally:
+            self._local.res = None
+
+        if self._tuner and not self._stop.is_set():
+            self._tuner.observe(bool(path), time.monotonic() - started, _is_throttled(err))
+
+        if path:
+            res.raw_path = path
+            return True
+        if err and res.attempts < max(1, cfg.retry_attempts) and not self._stop.is_set():
+            raise Retry(cfg.retry_delay * res.attempts)
+
+        if res.cached:
+            # Видео могли удалить — в следующий раз ищем заново
+            forget_resolution(normalize_query(res.query))
+        res.status = "failed"
+        res.error = res.error or "download failed"
+        return False
+
+    def _transcode(self, res: DownloadResult) -> bool:
+        if self._stop.is_set():
+            return self._abort(res)
+        cfg = self.config.download
+        if res.dup_of:
+            return self._link_copy(res)
+
+        self._mark(res, "transcoding", raw_path=res.raw_path)
+        if cfg.dedup:
+            res.audio_hash = file_hash(res.raw_path)
+            res.dup_of = self._find_copy(audio_hash=res.audio_hash)
+            if res.dup_of:
+                os.remove(res.raw_path)
+                return self._link_copy(res)
+
+        meta = self._metadata(res)
+        try:
+            ext = native_ext(res.raw_path, res.acodec) if cfg.codec == "native" else ""
+            if ext:
+                res.out_path = f"{res.base}.{ext}"
+                remux(res.raw_path, res.out_path, metadata=meta)
+            else:
+                res.out_path = f"{res.base}.mp3"
+                transcode(res.raw_path, res.out_path, quality=cfg.quality, metadata=meta)
+        except Exception:
+            # При Ctrl+C (ffmpeg получает его вместе с нами) исходник остаётся —
+            # докачка возьмёт его из журнала. Настоящий сбой ffmpeg удаляет его:
+            # иначе yt-dlp (overwrites: False) отдавал бы тот же битый файл при каждом повторе
             if self._stop.is_set():
-                res.status = "failed"
-                return res
-
-            for attempt in range(1, cfg.retry_attempts + 1):
-                if self._stop.is_set():
-                    res.status = "failed"
-                    return res
-
-                res.attempts += 1
-                try:
-                    opts = {**ydl_opts, "default_search": "ytsearch1"}
-                    with yt_dlp.YoutubeDL(opts) as ydl:
-                        ydl.download([sq])
-
-                    if os.path.exists(mp3_path):
-                        if self.config.metadata.add_tags and artist:
-                            add_tags(mp3_path, artist, title)
-                        res.status = "success"
-                        res.file_path = mp3_path
-                        res.file_size = os.path.getsize(mp3_path)
-                        time.sleep(cfg.pause)
-                        return res
-
-                except Exception as e:
-                    last_err = str(e)
-                    if attempt < cfg.retry_attempts:
-                        time.sleep(cfg.retry_delay * attempt)
+                return self._abort(res)
+            try:
+                os.remove(res.raw_path)
+            except OSError:
+                pass
+            raise
+        res.tagged = bool(meta)
+        os.remove(res.raw_path)
+        return True
+
+    def _find_copy(self, video_id: str = "", audio_hash: str = "") -> dict | None:
+        for row in find_media(video_id=video_id, audio_hash=audio_hash):
+            if os.path.exists(row["file_path"]):
+                return row
+        return None
+
+    def _link_copy(self, res: DownloadResult) -> bool:
+        src = res.dup_of["file_path"]
+        res.out_path = res.base + os.path.splitext(src)[1]
+        if os.path.abspath(src) != os.path.abspath(res.out_path):
+            # Жёсткая ссылка делит теги с оригиналом, поэтому при других тегах — копия
+            same_tags = (res.dup_of["artist"], res.dup_of["title"]) == (res.artist, res.title)
+            hardlink = same_tags or not (self.config.metadata.add_tags and res.artist)
+            link_or_copy(src, res.out_path, hardlink=hardlink)
+            res.tagged = same_tags
+        else:
+            res.tagged = True
+        return True
+
+    def _metadata(self, res: DownloadResult) -> dict | None:
+        if not (self.config.metadata.add_tags and res.artist):
+            return None
+        return {"title": res.title, "artist": res.artist, "comment": res.url}
 
+    def _finalize(self, res: DownloadResult) -> bool:
+        # Теги уже вписаны при конвертации; здесь — только копии дубликатов, одной записью
+        meta = self._metadata(res)
+        if meta and not res.tagged:
+            write_metadata(res.out_path, meta["artist"], meta["title"], url=meta["comment"])
+        res.status = "success"
+        res.file_path = res.out_path
+        res.file_size = os.path.getsize(res.out_path)
+        self.library.add(res.out_path, res.artist, res.title)
+        if self.config.download.dedup and not res.dup_of:
+            try:
+                save_media(res.out_path, res.video_id, res.audio_hash, res.artist, res.title)
+            except Exception:
+                pass
+        return False
+
+    @staticmethod
+    def _abort(res: DownloadResult) -> bool:
         res.status = "failed"
-        res.error = last_err
-        return res
+        return False
 
-    def stop(self):
-        self._stop.set()
\ No newline at end of file
+    @staticmethod
+    def _on_error(res: DownloadResult, exc: Exception):
+        res.status = "failed"
+        res.error = str(exc)
@@ -0,0 +1,16 @@
+import importlib
+
+
+# Модуль импортируется при первом обращении к атрибуту, а не при старте:
+# yt_dlp, mutagen и InquirerPy вместе стоят сотни миллисекунд
+class LazyModule:
+    def __init__(self, name: str):
+        self.__dict__["_name"] = name
+        self.__dict__["_module"] = None
+
+    def __getattr__(self, attr):
+        module = self.__dict__["_module"]
+        if module is None:
+            module = importlib.import_module(self.__dict__["_name"])
+            self.__dict__["_module"] = module
+        return getattr(module, attr)
@@ -0,0 +1,170 @@
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+
+from melodine.database import get_library_tags, save_library_tags
+from melodine.tagger import get_info
+from melodine.utils import AUDIO_EXTS, sanitize_filename
+
+_NON_WORD = re.compile(r"[\W_]+")
+TAG_READERS = 16
+
+
+def track_key(name: str) -> str:
+    # Регистр, пробелы и всё, что заменяет sanitize_filename, на совпадение не влияют
+    return " ".join(_NON_WORD.sub(" ", name.casefold()).split())
+
+
+def tag_key(artist: str, title: str) -> str:
+    return track_key(f"{artist} - {title}" if artist else title)
+
+
+# Снимок папки с музыкой: один обход при старте вместо os.path.exists
+# на каждый трек, дальше обновляется по мере записи файлов.
+# Обход читает только имена; теги новых файлов — лениво, при первом промахе по имени.
+class LibraryIndex:
+    def __init__(self, root: str):
+        self.root = root
+        self._names: dict[str, str] = {}
+        self._tags: dict[str, str] = {}
+        # Для файлов с тегами: ключ тегов и (size, mtime), при которых они прочитаны
+        self._tagged: dict[str, tuple] = {}
+        self._pending: list[str] = []
+        self._lock = Lock()
+        self._loading = Lock()
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def scan(self) -> "LibraryIndex":
+        files = {}
+        dirs = [self.root]
+        while dirs:
+            try:
+                it = os.scandir(dirs.pop())
+            except OSError:
+                continue
+            with it:
+                for entry in it:
+                    try:
+                        if entry.is_dir():
+                            if not entry.name.startswith("."):
+                                dirs.append(entry.path)
+                        elif entry.name.lower().endswith(AUDIO_EXTS) and entry.is_file():
+                            files[os.path.abspath(entry.path)] = entry.path
+                    except OSError:
+                        continue
+
+        try:
+            known = get_library_tags()
+        except Exception:
+            known = {}
+        with self._lock:
+            for key, path in files.items():
+                self._names[track_key(os.path.splitext(os.path.basename(path))[0])] = path
+                cached = known.get(key)
+                if cached:
+                    self._tag(path, cached[0], cached[1], cached[2], cached[3])
+                else:
+                    self._pending.append(path)
+
+        gone = [p for p in known if p.startswith(os.path.abspath(self.root) + os.sep) and p not in files]
+        if gone:
+            try:
+                save_library_tags([], gone)
+            except Exception:
+                pass
+        return self
+
+    def _tag(self, path: str, size: int, mtime: float, artist: str, title: str):
+        key = tag_key(artist, title) if title else ""
+        old = self._tagged.get(path)
+        if old and old[0] and self._tags.get(old[0]) == path:
+            del self._tags[old[0]]
+        self._tagged[path] = (key, size, mtime)
+        if key:
+            self._tags.setdefault(key, path)
+
+    def _load_tags(self):
+        # Все непрочитанные файлы разом и параллельно: на сетевом диске
+        # задержка одного чтения заголовка важнее объёма
+        with self._loading:
+            with self._lock:
+                paths, self._pending = self._pending, []
+            if not paths:
+                return
+            with ThreadPoolExecutor(max_workers=TAG_READERS, thread_name_prefix="tags") as pool:
+                rows = [r for r in pool.map(_read_tags, paths) if r]
+            with self._lock:
+                for path, size, mtime, artist, title in rows:
+                    self._tag(path, size, mtime, artist, title)
+            try:
+                save_library_tags([(os.path.abspath(p), *rest) for p, *rest in rows])
+            except Exception:
+                pass
+
+    def _current(self, path: str) -> bool:
+        # Совпадение по тегам из базы проверяем по размеру и mtime одного этого файла
+        try:
+            st = os.stat(path)
+        except OSError:
+            with self._lock:
+                self._tag(path, 0, 0, "", "")
+            return False
+        _, size, mtime = self._tagged.get(path, ("", 0, 0))
+        if (st.st_size, st.st_mtime) == (size, mtime):
+            return True
+        row = _read_tags(path)
+        if row:
+            with self._lock:
+                self._tag(*row)
+            try:
+                save_library_tags([(os.path.abspath(path), *row[1:])])
+            except Exception:
+                pass
+        return False
+
+    def add(self, path: str, artist: str = "", title: str = ""):
+        try:
+            st = os.stat(path)
+        except OSError:
+            st = None
+        with self._lock:
+            self._names[track_key(os.path.splitext(os.path.basename(path))[0])] = path
+            self._tag(path, st.st_size if st else 0, st.st_mtime if st else 0, artist, title)
+        if st:
+            try:
+                save_library_tags([(os.path.abspath(path), st.st_size, st.st_mtime, artist, title)])
+            except Exception:
+                pass
+
+    def find(self, artist: str, title: str) -> str:
+        # Имя файла ищем в том виде, в каком его сохраняет движок: длинные обрезаны
+        fname = f"{artist} - {title}" if artist else title
+        name = track_key(sanitize_filename(fname))
+        key = tag_key(artist, title)
+        with self._lock:
+            path = self._names.get(name)
+            if path:
+                return path
+            path = self._tags.get(key, "")
+            # Пока другой поток читает теги, ждём его, а не отвечаем «нет»
+            pending = bool(self._pending) or self._loading.locked()
+        if not path and pending:
+            self._load_tags()
+            with self._lock:
+                path = self._tags.get(key, "")
+        if path and not self._current(path):
+            with self._lock:
+                path = self._tags.get(key, "")
+        return path
+
+
+def _read_tags(path: str) -> tuple | None:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    info = get_info(path) or {}
+    return path, st.st_size, st.st_mtime, info.get("artist", ""), info.get("title", "")
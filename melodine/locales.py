@@ -8,6 +8,8 @@ _strings = {
         "menu_retry": "🔄  Докачать неудачные",
         "menu_retry_n": "🔄  Докачать неудачные ({n} треков)",
         "menu_retry_disabled": "нет неудачных",
+        "menu_resume": "▶️   Продолжить прерванную загрузку",
+        "menu_watch": "👁   Следить за плейлистами",
         "menu_search": "🔍  Найти и скачать трек",
         "menu_stats": "📊  Статистика",
         "menu_settings": "⚙️   Настройки",
@@ -25,6 +27,11 @@ _strings = {
         "dl_progress": "Скачивание",
         "dl_progress_title": "⬇ Прогресс",
         "dl_last": "Последний",
+        "dl_auto": "Потоки",
+        "stage_resolve": "🔎 поиск",
+        "stage_fetch": "⬇ сеть",
+        "stage_transcode": "🎛 ffmpeg",
+        "stage_tag": "🏷 теги",
 
         # -- retry --
         "retry_title": "🔄 Докачка неудачных треков",
@@ -33,6 +40,15 @@ _strings = {
         "retry_confirm": "Попробовать скачать {n} треков?",
         "retry_again": "🔄 Попробовать неудачные ещё раз",
 
+        # -- resume --
+        "watch_title": "👁  Слежение за плейлистами",
+        "watch_path": "Плейлист или папка для слежения:",
+        "watch_hint": "Новые строки и файлы проверяются каждые {s} с. Ctrl+C — остановить.",
+        "resume_title": "▶️  Продолжение загрузки",
+        "resume_none": "✅ Незавершённых загрузок нет!",
+        "resume_found": "{file}: осталось {n} треков",
+        "resume_confirm": "Продолжить скачивание {n} треков?",
+
         # -- post-download --
         "post_open": "📂 Открыть папку загрузок",
         "post_menu": "🏠 В главное меню",
@@ -58,6 +74,15 @@ _strings = {
         "stats_time": "⏱  Общее время:",
         "stats_week": "📈 Последние 7 дней:",
         "stats_top": "🏆 Топ артисты:",
+        "stats_timings": "⏱  Этапы, последние {n} треков (p50 / p95 / p99):",
+        "timing_search": "поиск",
+        "timing_throttle": "лимитер",
+        "timing_queue_wait": "очереди",
+        "timing_ttfb": "первый байт",
+        "timing_download": "загрузка",
+        "timing_bytes_per_sec": "скорость",
+        "timing_transcode": "ffmpeg",
+        "timing_tag": "теги",
 
         # -- настройки --
         "settings_title": "⚙️  Настройки",
@@ -76,20 +101,54 @@ _strings = {
         "settings_cancelled": "Отменено",
 
         # -- параметры скачивания --
-        "cfg_threads": "Потоки [{v}]:",
-        "cfg_threads_err": "Целое число от 1 до 15",
-        "cfg_pause": "Пауза между треками, сек [{v}]:",
-        "cfg_pause_err": "Число от 0 до 10",
+        "cfg_threads": "Потоки скачивания [{v}]:",
+        "cfg_threads_err": "Целое число от 1 до 64",
+        "cfg_threads_auto": "Подбирать число потоков автоматически?",
+        "cfg_threads_min": "Минимум потоков [{v}]:",
+        "cfg_threads_max": "Максимум потоков [{v}]:",
+        "cfg_threads_max_err": "Целое число до 64, не меньше минимума",
+        "cfg_resolve_threads": "Потоки поиска [{v}]:",
+        "cfg_resolve_threads_err": "Целое число от 1 до 32",
+        "cfg_transcode_threads": "Потоки конвертации (0 — по числу ядер) [{v}]:",
+        "cfg_transcode_threads_err": "Целое число от 0 до 64",
+        "cfg_tag_threads": "Потоки тегирования [{v}]:",
+        "cfg_tag_threads_err": "Целое число от 1 до 16",
+        "cfg_queue_size": "Размер очереди между этапами [{v}]:",
+        "cfg_queue_size_err": "Целое число от 1 до 1024",
+        "cfg_rate": "Запросов в секунду на все потоки (0 — без лимита) [{v}]:",
+        "cfg_rate_err": "Число от 0 до 100",
+        "cfg_burst": "Запросов подряд без ожидания [{v}]:",
+        "cfg_burst_err": "Целое число от 1 до 100",
         "cfg_retry": "Попытки при ошибке [{v}]:",
         "cfg_retry_err": "Целое число от 0 до 10",
         "cfg_retry_delay": "Задержка retry, сек [{v}]:",
         "cfg_retry_delay_err": "Число от 0 до 60",
+        "cfg_watch_interval": "Интервал опроса в режиме слежения, сек [{v}]:",
+        "cfg_progress": "Отображение прогресса:",
+        "cfg_progress_auto": "Авто (панель в терминале, строки при перенаправлении)",
+        "cfg_progress_rich": "Панель Rich",
+        "cfg_progress_plain": "Простые строки (для огромных плейлистов и логов)",
+        "cfg_watch_interval_err": "Число от 0.5 до 3600",
+        "cfg_codec": "Формат файлов:",
+        "cfg_codec_mp3": "MP3 (перекодирование)",
+        "cfg_codec_native": "Исходный кодек — Opus/AAC без перекодирования",
         "cfg_quality": "Качество MP3:",
         "cfg_duration": "Макс. длительность трека, сек [{v}]:",
         "cfg_duration_err": "Целое число от 60 до 3600",
         "cfg_timeout": "Таймаут соединения, сек [{v}]:",
         "cfg_timeout_err": "Целое число от 5 до 120",
+        "cfg_cache_ttl": "Хранить результаты поиска, дней (0 — не хранить) [{v}]:",
+        "cfg_cache_ttl_err": "Целое число от 0 до 365",
         "cfg_smart": "Smart Search (умный поиск)?",
+        "cfg_dedup": "Не качать повторно одно и то же видео (ссылка/копия)?",
+        "cfg_sync": "Инкрементальная синхронизация (только новые строки плейлиста)?",
+        "cfg_profile": "Профилировать загрузку (стеки и трассировка этапов)?",
+        "cfg_metrics_port": "Порт метрик Prometheus, 0 — выключено [{v}]:",
+        "cfg_metrics_port_err": "Порт от 0 до 65535",
+        "cfg_candidates": "Кандидатов на каждый вариант запроса [{v}]:",
+        "cfg_candidates_err": "Целое число от 1 до 20",
+        "cfg_match_threshold": "Порог совпадения кандидата, 0–1 [{v}]:",
+        "cfg_match_threshold_err": "Число от 0 до 1",
         "cfg_tags": "Добавлять ID3 теги (артист, название)?",
         "cfg_covers": "Скачивать обложки? (замедляет загрузку)",
 
@@ -117,14 +176,20 @@ _strings = {
         "playlist_tracks": "Треков:",
         "playlist_new": "Новых:",
         "playlist_existing": "уже скачаны",
+        "playlist_changed": "Новых строк с прошлой синхронизации:",
+        "playlist_removed": "Удалено строк:",
+        "sync_unchanged": "✅ Плейлист не менялся с прошлой синхронизации",
 
         "panel_result": "📊 Результат",
         "result_ok": "✅ Скачано:",
         "result_fail": "❌ Не удалось:",
         "result_retry": "🔄 С повтором:",
         "result_skip": "⏭  Пропущено:",
+        "result_dedup": "🔗 Повторы:",
+        "profile_saved": "🧪 Профиль сохранён: {path}",
         "result_time": "⏱  Время:",
         "result_size": "💾 Размер:",
+        "result_stages": "📈 Загрузка этапов:",
 
         "panel_failed": "❌ Неудачные ({n})",
         "failed_more": "... ещё {n}",
@@ -146,6 +211,8 @@ _strings = {
         "menu_retry": "🔄  Retry failed",
         "menu_retry_n": "🔄  Retry failed ({n} tracks)",
         "menu_retry_disabled": "no failed tracks",
+        "menu_resume": "▶️   Resume interrupted download",
+        "menu_watch": "👁   Watch playlists",
         "menu_search": "🔍  Find and download track",
         "menu_stats": "📊  Statistics",
         "menu_settings": "⚙️   Settings",
@@ -162,6 +229,11 @@ _strings = {
         "dl_progress": "Downloading",
         "dl_progress_title": "⬇ Progress",
         "dl_last": "Last",
+        "dl_auto": "Threads",
+        "stage_resolve": "🔎 search",
+        "stage_fetch": "⬇ network",
+        "stage_transcode": "🎛 ffmpeg",
+        "stage_tag": "🏷 tags",
 
         "retry_title": "🔄 Retry failed tracks",
         "retry_none": "✅ No failed tracks!",
@@ -169,6 +241,14 @@ _strings = {
         "retry_confirm": "Try downloading {n} tracks?",
         "retry_again": "🔄 Retry failed again",
 
+        "watch_title": "👁  Watching playlists",
+        "watch_path": "Playlist or folder to watch:",
+        "watch_hint": "New lines and files are checked every {s} s. Ctrl+C to stop.",
+        "resume_title": "▶️  Resume download",
+        "resume_none": "✅ No unfinished downloads!",
+        "resume_found": "{file}: {n} tracks left",
+        "resume_confirm": "Continue downloading {n} tracks?",
+
         "post_open": "📂 Open downloads folder",
         "post_menu": "🏠 Main menu",
         "post_prompt": "What's next?",
@@ -191,6 +271,15 @@ _strings = {
         "stats_time": "⏱  Total time:",
         "stats_week": "📈 Last 7 days:",
         "stats_top": "🏆 Top artists:",
+        "stats_timings": "⏱  Stages, last {n} tracks (p50 / p95 / p99):",
+        "timing_search": "search",
+        "timing_throttle": "throttle",
+        "timing_queue_wait": "queue wait",
+        "timing_ttfb": "first byte",
+        "timing_download": "download",
+        "timing_bytes_per_sec": "speed",
+        "timing_transcode": "ffmpeg",
+        "timing_tag": "tags",
 
         "settings_title": "⚙️  Settings",
         "settings_prompt": "Settings section",
@@ -207,20 +296,54 @@ _strings = {
         "settings_reset_done": "✅ Settings reset!",
         "settings_cancelled": "Cancelled",
 
-        "cfg_threads": "Threads [{v}]:",
-        "cfg_threads_err": "Integer from 1 to 15",
-        "cfg_pause": "Pause between tracks, sec [{v}]:",
-        "cfg_pause_err": "Number from 0 to 10",
+        "cfg_threads": "Download threads [{v}]:",
+        "cfg_threads_err": "Integer from 1 to 64",
+        "cfg_threads_auto": "Tune thread count automatically?",
+        "cfg_threads_min": "Minimum threads [{v}]:",
+        "cfg_threads_max": "Maximum threads [{v}]:",
+        "cfg_threads_max_err": "Integer up to 64, not below the minimum",
+        "cfg_resolve_threads": "Search threads [{v}]:",
+        "cfg_resolve_threads_err": "Integer from 1 to 32",
+        "cfg_transcode_threads": "Transcode threads (0 — one per CPU core) [{v}]:",
+        "cfg_transcode_threads_err": "Integer from 0 to 64",
+        "cfg_tag_threads": "Tagging threads [{v}]:",
+        "cfg_tag_threads_err": "Integer from 1 to 16",
+        "cfg_queue_size": "Queue size between stages [{v}]:",
+        "cfg_queue_size_err": "Integer from 1 to 1024",
+        "cfg_rate": "Requests per second across all threads (0 — unlimited) [{v}]:",
+        "cfg_rate_err": "Number from 0 to 100",
+        "cfg_burst": "Requests in a row without waiting [{v}]:",
+        "cfg_burst_err": "Integer from 1 to 100",
         "cfg_retry": "Retries on error [{v}]:",
         "cfg_retry_err": "Integer from 0 to 10",
         "cfg_retry_delay": "Retry delay, sec [{v}]:",
         "cfg_retry_delay_err": "Number from 0 to 60",
+        "cfg_watch_interval": "Watch mode poll interval, sec [{v}]:",
+        "cfg_progress": "Progress display:",
+        "cfg_progress_auto": "Auto (panel in a terminal, lines when redirected)",
+        "cfg_progress_rich": "Rich panel",
+        "cfg_progress_plain": "Plain lines (for huge playlists and logs)",
+        "cfg_watch_interval_err": "Number from 0.5 to 3600",
+        "cfg_codec": "File format:",
+        "cfg_codec_mp3": "MP3 (re-encode)",
+        "cfg_codec_native": "Source codec — Opus/AAC, no re-encoding",
         "cfg_quality": "MP3 quality:",
         "cfg_duration": "Max track duration, sec [{v}]:",
         "cfg_duration_err": "Integer from 60 to 3600",
         "cfg_timeout": "Connection timeout, sec [{v}]:",
         "cfg_timeout_err": "Integer from 5 to 120",
+        "cfg_cache_ttl": "Keep search results, days (0 — disabled) [{v}]:",
+        "cfg_cache_ttl_err": "Integer from 0 to 365",
         "cfg_smart": "Smart Search?",
+        "cfg_dedup": "Reuse files for the same video (link/copy) instead of downloading?",
+        "cfg_sync": "Incremental sync (queue only new playlist lines)?",
+        "cfg_profile": "Profile downloads (stack samples and a stage trace)?",
+        "cfg_metrics_port": "Prometheus metrics port, 0 to disable [{v}]:",
+        "cfg_metrics_port_err": "Port from 0 to 65535",
+        "cfg_candidates": "Candidates per query variant [{v}]:",
+        "cfg_candidates_err": "Integer from 1 to 20",
+        "cfg_match_threshold": "Candidate match threshold, 0–1 [{v}]:",
+        "cfg_match_threshold_err": "Number from 0 to 1",
         "cfg_tags": "Add ID3 tags (artist, title)?",
         "cfg_covers": "Download covers? (slower)",
 
@@ -245,14 +368,20 @@ _strings = {
         "playlist_tracks": "Tracks:",
         "playlist_new": "New:",
         "playlist_existing": "already downloaded",
+        "playlist_changed": "New lines since last sync:",
+        "playlist_removed": "Removed lines:",
+        "sync_unchanged": "✅ Playlist unchanged since last sync",
 
         "panel_result": "📊 Result",
         "result_ok": "✅ Downloaded:",
         "result_fail": "❌ Failed:",
         "result_retry": "🔄 Retried:",
         "result_skip": "⏭  Skipped:",
+        "result_dedup": "🔗 Reused:",
+        "profile_saved": "🧪 Profile saved: {path}",
         "result_time": "⏱  Time:",
         "result_size": "💾 Size:",
+        "result_stages": "📈 Stage utilisation:",
 
         "panel_failed": "❌ Failed ({n})",
         "failed_more": "... and {n} more",
@@ -0,0 +1,122 @@
+import logging
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+log = logging.getLogger("melodine")
+
+# Границы корзин в секундах — от быстрых тегов до долгих загрузок
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+HISTOGRAM_STAGES = ("search", "throttle", "queue_wait", "ttfb", "download", "transcode", "tag")
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        total = 0
+        for le, n in zip((*self.buckets, "+Inf"), self.counts):
+            total += n
+            yield le, total
+
+
+class MetricsServer:
+    # Текстовый формат Prometheus на 127.0.0.1:port/metrics, пока идёт загрузка
+    def __init__(self, engine, port: int):
+        self.engine = engine
+        self.port = port
+        self.histograms = {name: Histogram() for name in HISTOGRAM_STAGES}
+        self._server: ThreadingHTTPServer | None = None
+
+    def observe(self, timings: dict):
+        for name, hist in self.histograms.items():
+            if name in timings:
+                hist.observe(timings[name])
+
+    def start(self) -> bool:
+        render = self.render
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] not in ("/", "/metrics"):
+                    self.send_error(404)
+                    return
+                body = render().encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer(("127.0.0.1", self.port), Handler)
+        except OSError as e:
+            log.warning("metrics endpoint on port %s unavailable: %s", self.port, e)
+            return False
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True).start()
+        return True
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def render(self) -> str:
+        snap = self.engine.snapshot()
+        out = []
+
+        def metric(name, kind, help_text, samples):
+            out.append(f"# HELP melodine_{name} {help_text}")
+            out.append(f"# TYPE melodine_{name} {kind}")
+            for labels, value in samples:
+                lbl = ",".join(f'{k}="{v}"' for k, v in labels.items())
+                out.append(f"melodine_{name}{{{lbl}}} {value}" if lbl else f"melodine_{name} {value}")
+
+        metric("tracks_total", "counter", "Finished tracks by status.",
+               [({"status": s}, snap[s]) for s in ("success", "failed", "skipped")])
+        metric("retried_total", "counter", "Tracks that needed more than one download attempt.",
+               [({}, snap["retried"])])
+        metric("deduped_total", "counter", "Tracks linked or copied from an existing file.",
+               [({}, snap["deduped"])])
+        metric("downloaded_bytes_total", "counter", "Size of successfully saved files.",
+               [({}, snap["total_size"])])
+        metric("errors_total", "counter", "Failed tracks by error class.",
+               [({"class": c}, n) for c, n in sorted(snap["errors"].items())])
+        metric("jobs_in_flight", "gauge", "Jobs taken from the playlist and not finished yet.",
+               [({}, snap["in_flight"])])
+        metric("jobs_window", "gauge", "Upper bound on jobs in flight.", [({}, snap["window"])])
+
+        stages = self.engine.stages
+        metric("stage_active", "gauge", "Workers currently running a job, by stage.",
+               [({"stage": st.name}, st.active) for st in stages])
+        metric("stage_queue_depth", "gauge", "Jobs waiting in the stage inbox.",
+               [({"stage": st.name}, st.inbox.qsize()) for st in stages])
+        metric("stage_limit", "gauge", "Concurrent workers allowed, by stage.",
+               [({"stage": st.name}, st.limit) for st in stages])
+        metric("stage_busy_seconds_total", "counter", "Worker time spent inside the stage.",
+               [({"stage": st.name}, round(st.busy_time(), 3)) for st in stages])
+        metric("uptime_seconds", "gauge", "Seconds since the download started.",
+               [({}, round(snap["elapsed"], 3))])
+
+        out.append("# HELP melodine_stage_seconds Per-track time by stage.")
+        out.append("# TYPE melodine_stage_seconds histogram")
+        for name, hist in self.histograms.items():
+            for le, n in hist.cumulative():
+                out.append(f'melodine_stage_seconds_bucket{{stage="{name}",le="{le}"}} {n}')
+            out.append(f'melodine_stage_seconds_sum{{stage="{name}"}} {round(hist.sum, 6)}')
+            out.append(f'melodine_stage_seconds_count{{stage="{name}"}} {hist.count}')
+        return "\n".join(out) + "\n"
@@ -0,0 +1,233 @@
+import heapq
+import queue
+import time
+from threading import Thread, Lock, Event, Condition, get_ident
+
+_SENTINEL = object()
+
+
+class Stage:
+    def __init__(self, name: str, fn, workers: int, maxsize: int = 0, limit: int = 0, throttle=None):
+        self.name = name
+        self.fn = fn
+        self.throttle = throttle
+        self.workers = max(1, workers)
+        # Сколько воркеров реально работает одновременно; меняется на ходу
+        self.limit = min(limit, self.workers) if limit > 0 else self.workers
+        self.inbox: queue.Queue = queue.Queue(maxsize)
+        self.next: "Stage | None" = None
+        self.done = 0
+        self._busy = 0.0
+        self._running: dict[int, float] = {}
+        self._slots = 0
+        self._lock = Lock()
+        self._gate = Condition(Lock())
+
+    @property
+    def active(self) -> int:
+        return len(self._running)
+
+    def busy_time(self) -> float:
+        now = time.perf_counter()
+        with self._lock:
+            return self._busy + sum(now - s for s in self._running.values())
+
+    def utilisation(self, elapsed: float) -> float:
+        if elapsed <= 0:
+            return 0.0
+        return min(1.0, self.busy_time() / (self.limit * elapsed))
+
+    def set_limit(self, n: int):
+        with self._gate:
+            self.limit = max(1, min(n, self.workers))
+            self._gate.notify_all()
+
+    def _acquire(self):
+        with self._gate:
+            while self._slots >= self.limit:
+                self._gate.wait()
+            self._slots += 1
+
+    def _release(self):
+        with self._gate:
+            self._slots -= 1
+            self._gate.notify()
+
+    def _enter(self):
+        with self._lock:
+            self._running[get_ident()] = time.perf_counter()
+
+    def _leave(self):
+        with self._lock:
+            started = self._running.pop(get_ident())
+            self._busy += time.perf_counter() - started
+            self.done += 1
+
+
+class Retry(Exception):
+    def __init__(self, delay: float = 0.0):
+        super().__init__(delay)
+        self.delay = delay
+
+
+# Цепочка стадий с ограниченными очередями между ними.
+# Функция стадии возвращает True, если задачу нужно передать дальше,
+# и False, если задача завершена (успех, пропуск или ошибка).
+# Retry(delay) возвращает задачу в ту же стадию позже, не занимая воркер;
+# так же может ответить throttle — хук, который вызывается до захвата слота.
+# Задачи берутся из итератора лениво: в работе не больше window штук.
+class Pipeline:
+    def __init__(self, stages: list[Stage], stop: Event, on_error=None, window: int = 0):
+        self.stages = stages
+        self.results: queue.Queue = queue.Queue()
+        self._stop = stop
+        self._on_error = on_error
+        self.window = window or sum(st.workers + max(st.inbox.maxsize, 1) for st in stages)
+        self._threads: list[Thread] = []
+        self._room = Condition(Lock())
+        self._pending = 0
+        self._fed = False
+        self._error: BaseException | None = None
+        self._closed = Event()
+        self._lock = Lock()
+        self._deferred: list = []
+        self._timer = Condition(Lock())
+        self._seq = 0
+        for cur, nxt in zip(stages, stages[1:]):
+            cur.next = nxt
+
+    def start(self, jobs):
+        for st in self.stages:
+            for i in range(st.workers):
+                self._spawn(self._work, (st,), f"{st.name}-{i}")
+        self._spawn(self._schedule, (), "scheduler")
+        self._spawn(self._feed, (jobs,), "feeder")
+
+    @property
+    def in_flight(self) -> int:
+        return self._pending
+
+    def __iter__(self):
+        while True:
+            job = self.results.get()
+            if job is _SENTINEL:
+                self._raise()
+                return
+            yield job
+
+    def join(self):
+        for th in self._threads:
+            th.join()
+        self._raise()
+
+    def _raise(self):
+        # Сбой источника задач не должен выглядеть как конец плейлиста
+        if self._error is not None:
+            error, self._error = self._error, None
+            raise error
+
+    def _spawn(self, target, args, name):
+        th = Thread(target=target, args=args, name=name, daemon=True)
+        th.start()
+        self._threads.append(th)
+
+    def _feed(self, jobs):
+        head = self.stages[0]
+        try:
+            for job in jobs:
+                with self._room:
+                    while self._pending >= self.window and not self._stop.is_set():
+                        self._room.wait(0.2)
+                if self._stop.is_set():
+                    break
+                with self._lock:
+                    self._pending += 1
+                head.inbox.put(job)
+        except BaseException as e:
+            # Уже взятые задачи доработают, ошибка всплывёт в главном потоке после них
+            self._error = e
+        finally:
+            with self._lock:
+                self._fed = True
+                if self._pending == 0:
+                    self._close()
+
+    def _finish(self, job):
+        self.results.put(job)
+        with self._lock:
+            self._pending -= 1
+            if self._fed and self._pending == 0:
+                self._close()
+        with self._room:
+            self._room.notify()
+
+    def _close(self):
+        self.results.put(_SENTINEL)
+        self._closed.set()
+        with self._timer:
+            self._timer.notify()
+
+    def _defer(self, st: Stage, job, delay: float):
+        with self._timer:
+            self._seq += 1
+            heapq.heappush(self._deferred, (time.monotonic() + delay, self._seq, st, job))
+            self._timer.notify()
+
+    def _schedule(self):
+        while not self._closed.is_set():
+            with self._timer:
+                now = time.monotonic()
+                due = []
+                # При остановке отдаём всё сразу, чтобы задачи быстро завершились
+                while self._deferred and (self._deferred[0][0] <= now or self._stop.is_set()):
+                    due.append(heapq.heappop(self._deferred))
+                if not due:
+                    wait = self._deferred[0][0] - now if self._deferred else None
+                    self._timer.wait(min(wait, 0.5) if wait is not None else 0.5)
+                    continue
+            for _, _, st, job in due:
+                st.inbox.put(job)
+
+    def _work(self, st: Stage):
+        while not self._closed.is_set():
+            try:
+                job = st.inbox.get(timeout=0.2)
+            except queue.Empty:
+                continue
+
+            # Лимит частоты проверяется до захвата слота стадии: ждать токена задача
+            # уходит к планировщику, а ошибка завершает её, как ошибка самой стадии
+            if st.throttle and not self._stop.is_set():
+                try:
+                    st.throttle(job)
+                except Retry as r:
+                    self._defer(st, job, r.delay)
+                    continue
+                except Exception as e:
+                    self._fail(job, e)
+                    continue
+
+            st._acquire()
+            st._enter()
+            try:
+                forward = st.fn(job)
+            except Retry as r:
+                self._defer(st, job, r.delay)
+                continue
+            except Exception as e:
+                forward = False
+                if self._on_error:
+                    self._on_error(job, e)
+            finally:
+                st._leave()
+                st._release()
+
+            if forward and st.next:
+                st.next.inbox.put(job)
+            else:
+                self._finish(job)
+
+    def _fail(self, job, exc: Exception):
+        if self._on_error:
+            self._on_error(job, exc)
+        self._finish(job)
@@ -0,0 +1,90 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+SAMPLE_INTERVAL = 0.005
+
+
+class Tracer:
+    # Отрезки этапов по трекам и потокам в формате Chrome trace (chrome://tracing, Perfetto)
+    def __init__(self):
+        self.events: list[dict] = []
+        self._threads: dict[int, str] = {}
+        self._t0 = time.monotonic()
+
+    def span(self, name: str, start: float, end: float, **args):
+        tid = threading.get_ident()
+        if tid not in self._threads:
+            self._threads[tid] = threading.current_thread().name
+        self.events.append({
+            "name": name, "ph": "X", "pid": 1, "tid": tid,
+            "ts": (start - self._t0) * 1e6, "dur": (end - start) * 1e6, "args": args,
+        })
+
+    def save(self, path: str):
+        meta = [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": name}}
+            for tid, name in self._threads.items()
+        ]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": meta + self.events, "displayTimeUnit": "ms"}, f, ensure_ascii=False)
+
+
+class Sampler(threading.Thread):
+    # Снимает стеки всех потоков раз в interval; cProfile видел бы только главный поток
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        super().__init__(name="sampler", daemon=True)
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self._halt = threading.Event()
+
+    def run(self):
+        me = threading.get_ident()
+        while not self._halt.wait(self.interval):
+            names = {th.ident: th.name for th in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                # Потоки одной стадии сливаются: fetch-0, fetch-1 → fetch
+                thread = names.get(tid, str(tid)).rsplit("-", 1)[0]
+                self.stacks[";".join([thread, *reversed(stack)])] += 1
+
+    def stop(self):
+        self._halt.set()
+        self.join()
+
+    def save(self, path: str):
+        # Свёрнутые стеки — открываются в speedscope и flamegraph.pl
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class Profiler:
+    def __init__(self, out_dir: str):
+        self.out_dir = out_dir
+        self.tracer = Tracer()
+        self.sampler = Sampler()
+        self.paths: list[str] = []
+
+    def __enter__(self):
+        self.sampler.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.sampler.stop()
+        os.makedirs(self.out_dir, exist_ok=True)
+        base = os.path.join(self.out_dir, datetime.now().strftime("melodine-%Y%m%d-%H%M%S"))
+        self.tracer.save(f"{base}.trace.json")
+        self.sampler.save(f"{base}.folded")
+        self.paths = [f"{base}.trace.json", f"{base}.folded"]
+        return False
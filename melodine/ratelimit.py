@@ -0,0 +1,24 @@
+import time
+from threading import Lock
+
+
+# Общий на все потоки лимит запросов: rate в секунду, burst — запас подряд.
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._lock = Lock()
+
+    def reserve(self, n: int = 1) -> float:
+        # Токен списывается сразу, при нехватке — в долг; ждать вызывающий
+        # должен сам, столько секунд, сколько вернулось
+        if self.rate <= 0:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+            self._stamp = now
+            self._tokens -= n
+            return max(0.0, -self._tokens / self.rate)
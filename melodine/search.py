@@ -1,39 +1,97 @@
-import yt_dlp
+import re
+from difflib import SequenceMatcher
 
+from melodine.ytdl import YDLPool
+
+_pool = YDLPool({
+    "quiet": True,
+    "no_warnings": True,
+    "extract_flat": False,
+    "noplaylist": True,
+})
 
-def search_tracks(query: str, max_results: int = 5) -> list[dict]:
-    ydl_opts = {
-        "default_search": f"ytsearch{max_results}",
-        "quiet": True,
-        "no_warnings": True,
-        "extract_flat": False,
-        "noplaylist": True,
-    }
 
+def search_tracks(query: str, max_results: int = 5) -> list[dict]:
     results = []
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-            info = ydl.extract_info(query, download=False)
-
-            entries = info.get("entries", [info]) if info else []
-
-            for entry in entries:
-                if not entry:
-                    continue
-                results.append({
-                    "url": entry.get("webpage_url", ""),
-                    "title": entry.get("title", "Unknown"),
-                    "channel": entry.get("channel", entry.get("uploader", "Unknown")),
-                    "duration": entry.get("duration", 0),
-                    "views": entry.get("view_count", 0),
-                    "id": entry.get("id", ""),
-                })
+        info = _pool.get().extract_info(f"ytsearch{max_results}:{query}", download=False)
+        entries = info.get("entries", [info]) if info else []
+
+        for entry in entries:
+            if not entry:
+                continue
+            results.append(entry_to_result(entry))
     except Exception:
         pass
 
     return results
 
 
+def entry_to_result(entry: dict) -> dict:
+    return {
+        "url": entry.get("webpage_url") or entry.get("url", ""),
+        "title": entry.get("title", "Unknown"),
+        "channel": entry.get("channel", entry.get("uploader", "Unknown")),
+        "duration": entry.get("duration", 0),
+        "views": entry.get("view_count", 0),
+        "id": entry.get("id", ""),
+    }
+
+
+# --- оценка кандидатов ---
+
+_WORD = re.compile(r"[^\w\s]+")
+_UNWANTED = re.compile(
+    r"\b(live|cover|karaoke|remix|nightcore|sped up|slowed|8d|reaction|instrumental"
+    r"|concert|кавер|минус|концерт|караоке)\b"
+)
+
+
+def _norm(s: str) -> str:
+    return " ".join(_WORD.sub(" ", s.casefold()).split())
+
+
+def score_candidate(cand: dict, artist: str, title: str, max_duration: int) -> float:
+    duration = cand.get("duration") or 0
+    if duration and duration >= max_duration:
+        return 0.0
+
+    want = _norm(f"{artist} {title}" if artist else title)
+    name = _norm(cand.get("title") or "")
+    channel = _norm(cand.get("channel") or "")
+
+    words = set(want.split())
+    have = set(name.split()) | set(channel.split())
+    overlap = len(words & have) / len(words) if words else 0.0
+    score = 0.6 * overlap + 0.3 * SequenceMatcher(None, want, name).ratio()
+
+    # Автоканалы «Artist - Topic» и VEVO почти всегда дают студийную версию
+    if channel.endswith(" topic") or "vevo" in channel:
+        score += 0.1
+    if artist and _norm(artist) in channel:
+        score += 0.1
+
+    for word in set(_UNWANTED.findall(name)):
+        if word not in want:
+            score -= 0.2
+
+    if duration and duration < 60:
+        score -= 0.2
+    return score
+
+
+def pick_best(candidates: list[dict], artist: str, title: str, max_duration: int,
+              threshold: float = 0.35) -> dict | None:
+    best, best_score = None, threshold
+    for cand in candidates:
+        if not cand.get("url"):
+            continue
+        score = score_candidate(cand, artist, title, max_duration)
+        if score > best_score:
+            best, best_score = cand, score
+    return best
+
+
 def generate_search_queries(artist: str, title: str) -> list[str]:
     queries = []
     original = f"{artist} - {title}" if artist else title
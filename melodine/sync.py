@@ -0,0 +1,88 @@
+import os
+from typing import Iterator
+
+from melodine.database import (
+    start_session, finish_session, get_settled_queries, get_last_sync, get_line_fingerprints, save_sync,
+)
+from melodine.library import LibraryIndex
+from melodine.utils import iter_playlist, line_fingerprint
+
+
+# Инкрементальная синхронизация: сравнение плейлиста с прошлым запуском
+# по отпечаткам строк, размеру и mtime файла.
+class PlaylistSync:
+    def __init__(self, filepath: str, library: LibraryIndex, incremental: bool = True):
+        self.filepath = os.path.abspath(filepath)
+        self.stat = os.stat(self.filepath)
+        self.library = library
+        self.last = get_last_sync(self.filepath) if incremental else None
+        self.known: set[str] = set()
+        self.seen: set[str] = set()
+        self.removed: set[str] = set()
+        self.total = self.queued = self.new = 0
+        self.scanned = False
+
+    @property
+    def unchanged(self) -> bool:
+        last = self.last
+        return bool(last and last["synced"]) and (
+            (last["file_size"], last["file_mtime"]) == (self.stat.st_size, self.stat.st_mtime)
+        )
+
+    def scan(self) -> "PlaylistSync":
+        # Плейлист не держим в памяти: проход для подсчёта, затем поток в движок.
+        # Строки, уже синхронизированные прошлым запуском, в очередь не попадают
+        for _ in self._walk(check_library=True):
+            pass
+        self.scanned = True
+        return self
+
+    def tracks(self) -> Iterator[dict]:
+        if not self.scanned:
+            # Без scan() счётчики набираются по ходу: движок получает первую строку сразу
+            yield from self._walk(check_library=False)
+            return
+        for pos, tr in enumerate(iter_playlist(self.filepath)):
+            if line_fingerprint(tr) not in self.known:
+                yield {**tr, "position": pos}
+
+    def _walk(self, check_library: bool) -> Iterator[dict]:
+        self.known = get_line_fingerprints(self.filepath) if self.last else set()
+        for pos, tr in enumerate(iter_playlist(self.filepath)):
+            self.total += 1
+            fp = line_fingerprint(tr)
+            if fp in self.known:
+                self.seen.add(fp)
+                continue
+            self.queued += 1
+            if check_library:
+                if self.library.find(tr["artist"], tr["title"]):
+                    self.seen.add(fp)
+                else:
+                    self.new += 1
+            yield {**tr, "position": pos}
+        # Удалённые строки известны только после полного прохода
+        self.removed = self.known - self.seen
+
+    def count(self) -> tuple[int, int]:
+        # Отдельный проход только ради итогов — идёт параллельно с загрузкой
+        known = get_line_fingerprints(self.filepath) if self.last else set()
+        total = queued = 0
+        for tr in iter_playlist(self.filepath):
+            total += 1
+            if line_fingerprint(tr) not in known:
+                queued += 1
+        return total, queued
+
+    def record(self, session_id: int = 0, result: dict | None = None):
+        if result is None:
+            # Качать было нечего — отмечаем файл синхронизированным отдельной пустой сессией
+            session_id = start_session(self.filepath, 0)
+            finish_session(session_id, 0, 0, 0, 0, 0.0)
+            settled, synced = self.seen, True
+        else:
+            # Без ошибок и остановки каждая строка файла дошла до конца — файл синхронизирован
+            settled = self.seen | {line_fingerprint({"query": q}) for q in get_settled_queries(session_id)}
+            synced = not result["stopped"] and result["failed"] == 0
+        save_sync(session_id, self.filepath, self.stat.st_size, self.stat.st_mtime, synced,
+                  list(settled), list(self.removed))
@@ -1,51 +1,119 @@
+from base64 import b64encode
 from pathlib import Path
 
-from mutagen.mp3 import MP3
-from mutagen.id3 import ID3, TIT2, TPE1, APIC, ID3NoHeaderError
+from melodine.lazy import LazyModule
 
+mutagen = LazyModule("mutagen")
+mp3 = LazyModule("mutagen.mp3")
+mp4 = LazyModule("mutagen.mp4")
+oggopus = LazyModule("mutagen.oggopus")
+oggvorbis = LazyModule("mutagen.oggvorbis")
+flac = LazyModule("mutagen.flac")
+id3 = LazyModule("mutagen.id3")
 
-def add_tags(filepath: str, artist: str, title: str) -> bool:
+
+def _open_ogg(path: Path):
+    return oggopus.OggOpus(str(path)) if path.suffix.lower() == ".opus" else oggvorbis.OggVorbis(str(path))
+
+
+def _open_mp4(path: Path) -> "mp4.MP4":
+    audio = mp4.MP4(str(path))
+    if audio.tags is None:
+        audio.add_tags()
+    return audio
+
+
+# Свободное место после тега — последующие правки не переписывают весь файл
+ID3_PADDING = 8192
+
+
+def _id3_padding(info) -> int:
+    # Старый тег влезает на место — не двигаем аудио, иначе резервируем запас
+    return info.padding if info.padding >= 0 else ID3_PADDING
+
+
+def _picture(cover: bytes, mime: str) -> "flac.Picture":
+    pic = flac.Picture()
+    pic.type = 3  # Cover (front)
+    pic.mime = mime
+    pic.desc = "Cover"
+    pic.data = cover
+    return pic
+
+
+def write_metadata(filepath: str, artist: str = "", title: str = "", album: str = "", url: str = "",
+                   cover: bytes | None = None, mime: str = "image/jpeg") -> bool:
+    # Все поля за одно чтение и одну запись файла; пустые поля не трогаются
     try:
         path = Path(filepath)
         if not path.exists():
             return False
 
+        ext = path.suffix.lower()
+        if ext == ".m4a":
+            audio = _open_mp4(path)
+            for key, val in (("\xa9nam", title), ("\xa9ART", artist), ("\xa9alb", album), ("\xa9cmt", url)):
+                if val:
+                    audio[key] = [val]
+            if cover:
+                fmt = mp4.MP4Cover.FORMAT_PNG if mime == "image/png" else mp4.MP4Cover.FORMAT_JPEG
+                audio["covr"] = [mp4.MP4Cover(cover, imageformat=fmt)]
+            audio.save()
+            return True
+        if ext in (".opus", ".ogg"):
+            audio = _open_ogg(path)
+            for key, val in (("title", title), ("artist", artist), ("album", album), ("comment", url)):
+                if val:
+                    audio[key] = [val]
+            if cover:
+                audio["metadata_block_picture"] = [b64encode(_picture(cover, mime).write()).decode("ascii")]
+            audio.save()
+            return True
+
         try:
-            tags = ID3(str(path))
-        except ID3NoHeaderError:
-            tags = ID3()
+            tags = id3.ID3(str(path))
+        except id3.ID3NoHeaderError:
+            tags = id3.ID3()
 
-        tags["TIT2"] = TIT2(encoding=3, text=title)
-        tags["TPE1"] = TPE1(encoding=3, text=artist)
-        tags.save(str(path))
+        if title:
+            tags["TIT2"] = id3.TIT2(encoding=3, text=title)
+        if artist:
+            tags["TPE1"] = id3.TPE1(encoding=3, text=artist)
+        if album:
+            tags["TALB"] = id3.TALB(encoding=3, text=album)
+        if url:
+            # Так же, как ffmpeg пишет ключ comment в MP3
+            tags.add(id3.TXXX(encoding=3, desc="comment", text=url))
+        if cover:
+            tags["APIC"] = id3.APIC(encoding=3, mime=mime, type=3, desc="Cover", data=cover)
+        tags.save(str(path), padding=_id3_padding)
         return True
     except Exception:
         return False
 
 
+def add_tags(filepath: str, artist: str, title: str) -> bool:
+    return write_metadata(filepath, artist=artist, title=title)
+
+
 def add_cover(filepath: str, cover_data: bytes, mime: str = "image/jpeg") -> bool:
-    try:
-        try:
-            tags = ID3(filepath)
-        except ID3NoHeaderError:
-            tags = ID3()
-
-        tags["APIC"] = APIC(
-            encoding=3,
-            mime=mime,
-            type=3,  # Cover (front)
-            desc="Cover",
-            data=cover_data,
-        )
-        tags.save(filepath)
-        return True
-    except Exception:
-        return False
+    return write_metadata(filepath, cover=cover_data, mime=mime)
 
 
 def get_info(filepath: str) -> dict | None:
     try:
-        audio = MP3(filepath)
+        if Path(filepath).suffix.lower() != ".mp3":
+            audio = mutagen.File(filepath, easy=True)
+            if audio is None:
+                return None
+            return {
+                "duration": audio.info.length,
+                "bitrate": getattr(audio.info, "bitrate", 0) // 1000,
+                "artist": (audio.get("artist") or [""])[0],
+                "title": (audio.get("title") or [""])[0],
+            }
+
+        audio = mp3.MP3(filepath)
         info = {
             "duration": audio.info.length,
             "bitrate": audio.info.bitrate // 1000,
@@ -54,7 +122,7 @@ def get_info(filepath: str) -> dict | None:
         }
 
         try:
-            tags = ID3(filepath)
+            tags = id3.ID3(filepath)
             if "TPE1" in tags:
                 info["artist"] = str(tags["TPE1"])
             if "TIT2" in tags:
@@ -64,4 +132,4 @@ def get_info(filepath: str) -> dict | None:
 
         return info
     except Exception:
-        return None
\ No newline at end of file
+        return None
@@ -0,0 +1,54 @@
+import os
+import shutil
+import subprocess
+
+# Контейнер для исходного кодека при копировании потока без перекодирования
+NATIVE_EXT = {"opus": "opus", "vorbis": "ogg", "mp4a": "m4a", "aac": "m4a", "mp3": "mp3"}
+_SOURCE_EXT = {".webm": "opus", ".opus": "opus", ".ogg": "ogg", ".m4a": "m4a", ".mp4": "m4a",
+               ".aac": "m4a", ".mp3": "mp3"}
+_MUXER = {"mp3": "mp3", "opus": "opus", "ogg": "ogg", "m4a": "ipod"}
+
+
+def find_ffmpeg() -> str:
+    path = shutil.which("ffmpeg")
+    if not path:
+        raise RuntimeError("FFmpeg not found in PATH")
+    return path
+
+
+def native_ext(src: str, acodec: str = "") -> str:
+    codec = (acodec or "").split(".")[0].lower()
+    if codec in NATIVE_EXT:
+        return NATIVE_EXT[codec]
+    return _SOURCE_EXT.get(os.path.splitext(src)[1].lower(), "")
+
+
+def transcode(src: str, dst: str, quality: int = 320, metadata: dict | None = None) -> None:
+    _run_ffmpeg(src, dst, ["-codec:a", "libmp3lame", "-b:a", f"{quality}k"], metadata)
+
+
+def remux(src: str, dst: str, metadata: dict | None = None) -> None:
+    _run_ffmpeg(src, dst, ["-codec:a", "copy"], metadata)
+
+
+def _run_ffmpeg(src: str, dst: str, codec_args: list[str], metadata: dict | None = None) -> None:
+    # Пишем во временный файл, чтобы недописанный трек не считался скачанным
+    tmp = f"{dst}.tmp"
+    fmt = _MUXER[os.path.splitext(dst)[1].lstrip(".").lower()]
+    # Теги пишет сам ffmpeg — файл не приходится перечитывать и переписывать ради них
+    meta_args = [arg for key, val in (metadata or {}).items() if val for arg in ("-metadata", f"{key}={val}")]
+    cmd = [
+        find_ffmpeg(), "-y", "-nostdin", "-hide_banner", "-loglevel", "error",
+        "-i", src, "-vn", *codec_args, *meta_args,
+        "-f", fmt, tmp,
+    ]
+    try:
+        # stdin терминала не трогаем: иначе ffmpeg съедает нажатия, а фоновый запуск ловит SIGTTIN
+        proc = subprocess.run(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+        if proc.returncode != 0:
+            err = proc.stderr.decode("utf-8", "replace").strip().splitlines()
+            raise RuntimeError(err[-1] if err else f"ffmpeg exited with {proc.returncode}")
+        os.replace(tmp, dst)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
@@ -1,5 +1,10 @@
+import os
 import re
+import shutil
+import hashlib
+import logging
 from pathlib import Path
+from typing import Iterator
 from melodine.locales import t
 
 
@@ -8,6 +13,48 @@ def sanitize_filename(name: str) -> str:
     return s.strip('. ')[:200]
 
 
+def setup_logging(path: str) -> None:
+    log = logging.getLogger("melodine")
+    if log.handlers or not path:
+        return
+    try:
+        handler = logging.FileHandler(path, encoding="utf-8")
+    except OSError:
+        return
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    log.addHandler(handler)
+    log.setLevel(logging.INFO)
+
+
+AUDIO_EXTS = (".mp3", ".opus", ".m4a", ".ogg")
+
+
+def file_hash(path: str) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def link_or_copy(src: str, dst: str, hardlink: bool = True) -> None:
+    if hardlink:
+        try:
+            os.link(src, dst)
+            return
+        except OSError:
+            pass
+    shutil.copy2(src, dst)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.casefold().split())
+
+
+def line_fingerprint(track: dict) -> str:
+    return hashlib.sha1(normalize_query(track["query"]).encode("utf-8")).hexdigest()[:16]
+
+
 def format_size(b: int) -> str:
     if b < 1024:
         return f"{b} B"
@@ -51,47 +98,70 @@ _JUNK = [
 _DASHES = [' - ', ' — ', ' – ', ' − ', ' ‐ ', ' ─ ']
 
 
+_NUM_RE = re.compile("|".join(_NUM_PREFIX))
+_JUNK_RE = re.compile("|".join(_JUNK))
+_NUMERIC_RE = re.compile(r'^[\d\s.,:;]+$')
+_LETTER_RE = re.compile(r'[a-zA-Zа-яА-ЯёЁ]')
+_DATE_RE = re.compile(r'^\d{2,4}[-/.]\d{2}[-/.]\d{2,4}')
+
+
 def parse_playlist(filepath: str) -> list[dict]:
+    return list(iter_playlist(filepath))
+
+
+def iter_playlist(filepath: str) -> Iterator[dict]:
     path = Path(filepath)
     if not path.exists():
-        return []
+        return
 
-    raw = path.read_text(encoding="utf-8-sig")
-    tracks = []
+    # Построчно, без чтения всего файла: первые треки доступны сразу.
+    # newline="" + splitlines даёт те же строки, что и splitlines по всему тексту
+    line_num = 0
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        for chunk in f:
+            for raw_line in chunk.splitlines():
+                line_num += 1
+                track = _parse_line(raw_line, line_num)
+                if track:
+                    yield track
 
-    for line_num, raw_line in enumerate(raw.splitlines(), 1):
-        line = raw_line.strip()
-        if not line or len(line) < 3:
-            continue
-        if _is_junk(line):
-            continue
 
-        line = _strip_number(line)
-        if not line or len(line) < 3:
-            continue
+def _parse_line(raw_line: str, line_num: int) -> dict | None:
+    line = raw_line.strip()
+    if not line or len(line) < 3:
+        return None
+    if _is_junk(line):
+        return None
 
-        artist, title = _split_track(line)
+    line = _strip_number(line)
+    if not line or len(line) < 3:
+        return None
 
-        if not title:
-            if _looks_like_track(line):
-                tracks.append({"artist": "", "title": line, "query": line, "line": line_num})
-            continue
+    artist, title = _split_track(line)
 
-        query = f"{artist} - {title}" if artist else title
-        tracks.append({"artist": artist, "title": title, "query": query, "line": line_num})
+    if not title:
+        if _looks_like_track(line):
+            return {"artist": "", "title": line, "query": line, "line": line_num}
+        return None
 
-    return tracks
+    query = f"{artist} - {title}" if artist else title
+    return {"artist": artist, "title": title, "query": query, "line": line_num}
 
 
 def _is_junk(line):
-    low = line.lower().strip()
-    for p in _JUNK:
-        if re.match(p, low):
-            return True
-    return re.match(r'^[\d\s.,:;]+$', line) is not None
+    if _JUNK_RE.match(line.lower().strip()):
+        return True
+    return _NUMERIC_RE.match(line) is not None
 
 
 def _strip_number(line):
+    m = _NUM_RE.match(line)
+    if not m:
+        return line
+    cleaned = line[m.end():]
+    if cleaned != line and len(cleaned) > 2:
+        return cleaned.strip()
+    # Редкий случай: первый подходящий префикс съел слишком много — перебираем как раньше
     for p in _NUM_PREFIX:
         cleaned = re.sub(p, '', line)
         if cleaned != line and len(cleaned) > 2:
@@ -112,8 +182,8 @@ def _split_track(line):
 def _looks_like_track(line):
     if len(line) > 200:
         return False
-    if not re.search(r'[a-zA-Zа-яА-ЯёЁ]', line):
+    if not _LETTER_RE.search(line):
         return False
-    if re.match(r'^\d{2,4}[-/.]\d{2}[-/.]\d{2,4}', line):
+    if _DATE_RE.match(line):
         return False
     return True
\ No newline at end of file
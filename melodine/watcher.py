@@ -0,0 +1,83 @@
+import logging
+import os
+import time
+from typing import Callable, Iterator
+
+from melodine.utils import iter_playlist, line_fingerprint
+
+PLAYLIST_EXTS = (".txt", ".m3u", ".m3u8")
+
+log = logging.getLogger("melodine")
+
+
+# Бесконечный источник треков для движка: опрашивает плейлисты и папку
+# по mtime и отдаёт только строки, которых ещё не было.
+class PlaylistWatcher:
+    def __init__(self, paths: list[str], stopped: Callable[[], bool], interval: float = 5.0,
+                 known: Callable[[str], set[str]] | None = None):
+        self.paths = [os.path.abspath(p) for p in paths]
+        self.interval = interval
+        self._stopped = stopped
+        self._known = known
+        self._stat: dict[str, tuple] = {}
+        self._pending: dict[str, tuple] = {}
+        self.seen: dict[str, set[str]] = {}
+        self.queued: dict[str, set[str]] = {}
+
+    def files(self) -> list[str]:
+        found = []
+        for p in self.paths:
+            if os.path.isdir(p):
+                for entry in sorted(os.scandir(p), key=lambda e: e.name):
+                    if entry.is_file() and entry.name.lower().endswith(PLAYLIST_EXTS):
+                        found.append(entry.path)
+            elif os.path.isfile(p):
+                found.append(p)
+        return found
+
+    def __iter__(self) -> Iterator[dict]:
+        first = True
+        while not self._stopped():
+            for path in self.files():
+                for track in self._poll(path, settled=first):
+                    yield track
+                    if self._stopped():
+                        return
+            first = False
+            self._sleep()
+
+    def _poll(self, path: str, settled: bool) -> Iterator[dict]:
+        try:
+            st = os.stat(path)
+        except OSError:
+            return
+        stat = (st.st_size, st.st_mtime)
+        if self._stat.get(path) == stat:
+            return
+        # Файл могут ещё дописывать: берём его, когда размер и mtime не менялись один опрос
+        if not settled and self._pending.get(path) != stat:
+            self._pending[path] = stat
+            return
+        self._pending.pop(path, None)
+        self._stat[path] = stat
+
+        if path not in self.seen:
+            self.seen[path] = set(self._known(path)) if self._known else set()
+        seen = self.seen[path]
+        queued = self.queued.setdefault(path, set())
+        # Нечитаемый файл (другая кодировка, удалён после stat) не должен
+        # останавливать слежение: пропускаем до его следующего изменения
+        try:
+            for track in iter_playlist(path):
+                fp = line_fingerprint(track)
+                if fp not in seen:
+                    seen.add(fp)
+                    queued.add(fp)
+                    yield track
+        except (OSError, UnicodeDecodeError) as e:
+            log.warning("watch: cannot read %s: %s", path, e)
+
+    def _sleep(self):
+        deadline = time.monotonic() + self.interval
+        while not self._stopped() and time.monotonic() < deadline:
+            time.sleep(0.2)
@@ -0,0 +1,42 @@
+from threading import local, Lock
+
+from melodine.lazy import LazyModule
+
+yt_dlp = LazyModule("yt_dlp")
+
+
+# Один долгоживущий YoutubeDL на поток: экстракторы, cookies и
+# keep-alive соединения переживают тысячи треков, а не создаются заново.
+class YDLPool:
+    def __init__(self, opts: dict):
+        self.opts = opts
+        self._local = local()
+        self._all: list["yt_dlp.YoutubeDL"] = []
+        self._lock = Lock()
+
+    def get(self, **params) -> "yt_dlp.YoutubeDL":
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is None:
+            # YoutubeDL хранит переданный dict как params — каждому потоку своя копия
+            ydl = yt_dlp.YoutubeDL(dict(self.opts))
+            self._local.ydl = ydl
+            with self._lock:
+                self._all.append(ydl)
+
+        # Параметры конкретной загрузки меняем на месте, без пересоздания
+        for key, val in params.items():
+            if key == "outtmpl":
+                ydl.params["outtmpl"] = {**ydl.params.get("outtmpl", {}), "default": val}
+            else:
+                ydl.params[key] = val
+        return ydl
+
+    def close(self):
+        with self._lock:
+            instances, self._all = self._all, []
+        for ydl in instances:
+            try:
+                ydl.close()
+            except Exception:
+                pass
+        self._local = local()